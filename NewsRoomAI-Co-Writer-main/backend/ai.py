@@ -1,13 +1,21 @@
 import os
 import json
-from typing import Dict
-from dotenv import load_dotenv
-from openai import OpenAI
-from newspaper import Article
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
 
+from cache import result_cache, prompt_version, make_key
+from llm_scheduler import scheduler
+from chunking import chunk_text
+from json_stream import IncrementalJSONParser
+from fetcher import get_fetcher
+from metrics import timed_stage
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("LLM_API_KEY"))
+
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0.2
+# Longer articles are analyzed per chunk in parallel and then merged
+ANALYSIS_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "3000"))
 
 FINAL_PROMPT = """
 You are an advanced civilizational news analysis system.
@@ -108,6 +116,102 @@ Article:
 
 """
 
+# Framework and rules shared by the full, fast and deep prompts
+_FRAMEWORK = FINAL_PROMPT.split("────────────────────────────────\nOUTPUT FORMAT")[0]
+
+FAST_PROMPT = """
+You are a rigorous, neutral news bias analyst.
+
+Assess the framing and bias of the given news article.
+
+────────────────────────────────
+STRICT RULES
+────────────────────────────────
+- DO NOT introduce facts, actors, motives, or events not present in the article
+- DO NOT moralize emotionally; be analytical and causal
+- Tone must be neutral, rigorous, and academic
+- Output MUST be valid JSON ONLY (no markdown, no commentary)
+
+────────────────────────────────
+OUTPUT FORMAT (STRICT JSON)
+────────────────────────────────
+{
+  "bias_score": <integer 0-100>,
+  "bias_label": "<Low | Moderate | High>",
+  "summary": "<3–4 sentence neutral factual summary>",
+  "perspectives": [
+    "<authority or policy perspective>",
+    "<societal or public response perspective>"
+  ],
+  "explanation": "<short explanation of bias and framing>"
+}
+
+Article:
+
+"""
+
+DEEP_PROMPT = _FRAMEWORK + """────────────────────────────────
+OUTPUT FORMAT (STRICT JSON)
+────────────────────────────────
+{
+  "PASSIONIT": {
+    "Probing": "<analysis>",
+    "Innovating": "<analysis>",
+    "Acting": "<analysis>",
+    "Scoping": "<analysis>",
+    "Setting": "<analysis>",
+    "Owning": "<analysis>",
+    "Nurturing": "<analysis>",
+    "Integrated": "<analysis>",
+    "Transformation": "<analysis>"
+  },
+  "PRUTL": {
+    "Positive_Soul": "<analysis>",
+    "Negative_Soul": "<analysis>",
+    "Positive_Materialism": "<analysis>",
+    "Negative_Materialism": "<analysis>"
+  },
+  "governance_soul_culture": {
+    "Governance_Father": "<analysis>",
+    "Soul_Son": "<analysis>",
+    "Culture_Spirit": "<analysis>"
+  },
+  "kalki_aidharma": "<civilizational and faith-principle interpretation>"
+}
+
+Article:
+
+"""
+
+_MERGE_TASK = """
+────────────────────────────────
+MERGE TASK
+────────────────────────────────
+You are given a JSON list of partial analyses. Each one covers a
+consecutive section of the SAME article, in order. Combine them into a
+single analysis of the whole article in the OUTPUT FORMAT above.
+- Any bias_score must reflect the article as a whole, weighing longer sections more
+- Any summary must cover the whole article in 3–4 sentences
+- Merge each framework dimension across sections
+- Use only what the partial analyses contain
+
+Partial analyses:
+
+"""
+
+
+def _merge_prompt(prompt: str) -> str:
+    return prompt.rsplit("Article:", 1)[0] + _MERGE_TASK
+
+
+def bias_label_for_score(score: int) -> str:
+    if score < 34:
+        return "Low"
+    if score < 67:
+        return "Moderate"
+    return "High"
+
+@timed_stage("parse")
 def parse_llm_output(raw_text: str) -> Dict:
     start = raw_text.find("{")
     end = raw_text.rfind("}") + 1
@@ -116,17 +220,7 @@ def parse_llm_output(raw_text: str) -> Dict:
 
     return json.loads(raw_text[start:end])
 
-def analyze_text(text: str) -> Dict:
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": FINAL_PROMPT},
-            {"role": "user", "content": text}
-        ],
-        temperature=0.2
-    )
-
-    raw_output = response.choices[0].message.content
+def build_analysis_result(raw_output: str) -> Dict:
     data = parse_llm_output(raw_output)
 
  
@@ -147,12 +241,119 @@ def analyze_text(text: str) -> Dict:
         "deep_analysis": deep_analysis        
     }
 
-def fetch_article_from_link(url: str) -> str:
-    article = Article(url)
-    article.download()
-    article.parse()
+def build_deep_result(raw_output: str) -> Dict:
+    data = parse_llm_output(raw_output)
+    # Tolerate the model wrapping the block like FINAL_PROMPT does
+    return data.get("deep_analysis", data)
+
+
+@dataclass(frozen=True)
+class AnalysisTier:
+    namespace: str
+    prompt: str
+    build: Callable[[str], Dict]
+
+    @property
+    def merge_prompt(self) -> str:
+        return _merge_prompt(self.prompt)
+
+    @property
+    def version(self) -> str:
+        return prompt_version(self.prompt + self.merge_prompt)
+
+
+# Fast tier is returned by /analyze; deep tier is generated on first view
+FAST_TIER = AnalysisTier("analyze", FAST_PROMPT, build_analysis_result)
+DEEP_TIER = AnalysisTier("analyze_deep", DEEP_PROMPT, build_deep_result)
+FULL_TIER = AnalysisTier("analyze_full", FINAL_PROMPT, build_analysis_result)
+
+FINAL_PROMPT_VERSION = FULL_TIER.version
+
+
+def _messages(prompt: str, content: str):
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": content}
+    ]
+
+async def _complete_async(prompt: str, content: str, build: Callable[[str], Dict]) -> Dict:
+    response = await scheduler.chat_async(
+        model=MODEL,
+        messages=_messages(prompt, content),
+        temperature=TEMPERATURE
+    )
+
+    return build(response.choices[0].message.content)
+
+async def _run_tier_async(tier: AnalysisTier, text: str) -> Dict:
+    return await result_cache.aget_or_compute(
+        tier.namespace,
+        text,
+        tier.version,
+        MODEL,
+        TEMPERATURE,
+        lambda: _map_reduce_async(tier, text),
+    )
+
+async def _map_reduce_async(tier: AnalysisTier, text: str) -> Dict:
+    chunks = chunk_text(text, ANALYSIS_CHUNK_TOKENS)
+    if len(chunks) == 1:
+        return await _complete_async(tier.prompt, text, tier.build)
+
+    # Map: latency follows the longest chunk, not the whole article
+    partials = await asyncio.gather(*(_run_tier_async(tier, chunk) for chunk in chunks))
+    sections = [
+        {"section": i + 1, "characters": len(chunk), "analysis": partial}
+        for i, (chunk, partial) in enumerate(zip(chunks, partials))
+    ]
+    return await _complete_async(
+        tier.merge_prompt, json.dumps(sections, ensure_ascii=False), tier.build
+    )
+
+
+async def analyze_text_async(text: str) -> Dict:
+    return await _run_tier_async(FAST_TIER, text)
+
+async def analyze_deep_async(text: str) -> Dict:
+    return await _run_tier_async(DEEP_TIER, text)
+
+async def analyze_full_async(text: str) -> Dict:
+    return await _run_tier_async(FULL_TIER, text)
+
+async def cached_full_analysis(text: str) -> Optional[Dict]:
+    key = make_key(FULL_TIER.namespace, text, FULL_TIER.version, MODEL, TEMPERATURE)
+    return await asyncio.to_thread(result_cache.get, FULL_TIER.namespace, key)
+
+async def stream_full_analysis_async(text: str) -> AsyncIterator[Tuple[str, Any]]:
+    """Yield ("field", (path, value)) as fields close, then ("result", analysis)."""
+    parser = IncrementalJSONParser()
+    key = make_key(FULL_TIER.namespace, text, FULL_TIER.version, MODEL, TEMPERATURE)
+    cached = await asyncio.to_thread(result_cache.get, FULL_TIER.namespace, key)
+
+    if cached is None and len(chunk_text(text, ANALYSIS_CHUNK_TOKENS)) > 1:
+        # Map-reduce output can't be streamed; emit the merged result field by field
+        cached = await analyze_full_async(text)
+
+    if cached is not None:
+        for field in parser.feed(json.dumps(cached, ensure_ascii=False)):
+            yield "field", field
+        yield "result", cached
+        return
+
+    async with scheduler.stream_async(
+        model=MODEL,
+        messages=_messages(FINAL_PROMPT, text),
+        temperature=TEMPERATURE
+    ) as stream:
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            for field in parser.feed(chunk.choices[0].delta.content):
+                yield "field", field
 
-    if not article.text.strip():
-        raise Exception("Failed to extract article text")
+    result = build_analysis_result(parser.text)
+    await asyncio.to_thread(result_cache.set, FULL_TIER.namespace, key, result)
+    yield "result", result
 
-    return article.title, article.text
\ No newline at end of file
+def fetch_article_from_link(url: str) -> Tuple[str, str]:
+    return get_fetcher().fetch(url)
\ No newline at end of file
@@ -0,0 +1,237 @@
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select as sa_select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from database import engine
+from model import AppMeta, Article, ArticleBiasDaily
+from ai import bias_label_for_score
+
+ANALYTICS_MAX_DAYS = int(os.getenv("ANALYTICS_MAX_DAYS", str(5 * 366)))
+
+_UPSERT = {
+    "sqlite": sqlite_insert,
+    "postgresql": pg_insert,
+}.get(engine.dialect.name)
+
+RollupKey = Tuple[date, int, int]
+
+
+def rollup_key(article: Article) -> RollupKey:
+    return (article.created_at.date(), article.author_id, article.bias_score)
+
+
+# =========================
+# INCREMENTAL MAINTENANCE
+# =========================
+
+def _bump(session: Session, deltas: Dict[RollupKey, int]):
+    table = ArticleBiasDaily.__table__
+    for (day, author_id, bias_score), delta in deltas.items():
+        if not delta:
+            continue
+        if _UPSERT:
+            # Atomic in the database so concurrent writers can't lose counts
+            statement = _UPSERT(table).values(
+                day=day, author_id=author_id, bias_score=bias_score, articles=delta
+            )
+            session.execute(statement.on_conflict_do_update(
+                index_elements=["day", "author_id", "bias_score"],
+                set_={"articles": table.c.articles + delta},
+            ))
+        else:
+            row = session.get(ArticleBiasDaily, (day, author_id, bias_score)) or ArticleBiasDaily(
+                day=day, author_id=author_id, bias_score=bias_score
+            )
+            row.articles += delta
+            session.add(row)
+
+
+def add_to_rollups(session: Session, articles: Iterable[Article]):
+    # Runs inside the caller's transaction, like the search index
+    deltas: Dict[RollupKey, int] = defaultdict(int)
+    for article in articles:
+        deltas[rollup_key(article)] += 1
+    _bump(session, deltas)
+
+
+def remove_from_rollups(session: Session, article: Article):
+    _bump(session, {rollup_key(article): -1})
+
+
+def move_in_rollups(session: Session, before: RollupKey, article: Article):
+    after = rollup_key(article)
+    if before != after:
+        _bump(session, {before: -1, after: 1})
+
+
+ROLLUPS_BACKFILLED = "rollups_backfilled"
+
+
+def _claim_backfill(session: Session) -> bool:
+    """Insert the completion marker; False if another process already has it."""
+    table = AppMeta.__table__
+    values = {"key": ROLLUPS_BACKFILLED, "value": "1", "updated_at": datetime.utcnow()}
+    if _UPSERT:
+        result = session.execute(
+            _UPSERT(table).values(**values).on_conflict_do_nothing(index_elements=["key"])
+        )
+        return result.rowcount == 1
+    try:
+        session.execute(insert(table).values(**values))
+        return True
+    except IntegrityError:
+        session.rollback()
+        return False
+
+
+def setup_rollups():
+    # First start on an existing archive: build the rollups with one aggregate.
+    # The marker commits with the rollups, so this runs once per database.
+    with Session(engine) as session:
+        if session.get(AppMeta, ROLLUPS_BACKFILLED):
+            return
+        if not _claim_backfill(session):
+            return
+
+        # Live writers bump rollups in the same transaction as their article.
+        # Holding them off until commit keeps the aggregate and the table in
+        # step; on SQLite the marker insert already holds the write lock.
+        if engine.dialect.name == "postgresql":
+            session.execute(text(
+                f"LOCK TABLE {ArticleBiasDaily.__tablename__} IN SHARE ROW EXCLUSIVE MODE"
+            ))
+
+        day = func.date(Article.created_at)
+        rows = session.execute(
+            sa_select(day, Article.author_id, Article.bias_score, func.count())
+            .group_by(day, Article.author_id, Article.bias_score)
+        ).all()
+
+        # Rows bumped before the lock are already counted by the aggregate
+        table = ArticleBiasDaily.__table__
+        session.execute(delete(table))
+        if rows:
+            session.execute(insert(table), [
+                {
+                    "day": d if isinstance(d, date) else date.fromisoformat(d),
+                    "author_id": author_id,
+                    "bias_score": bias_score,
+                    "articles": n,
+                }
+                for d, author_id, bias_score, n in rows
+            ])
+        session.commit()
+
+
+# =========================
+# QUERIES
+# =========================
+
+def _conditions(start: Optional[date], end: Optional[date], author_id: Optional[int]) -> List:
+    if start and end and start > end:
+        raise ValueError("start must not be after end")
+    if start and end and (end - start).days > ANALYTICS_MAX_DAYS:
+        raise ValueError(f"Time range is limited to {ANALYTICS_MAX_DAYS} days")
+
+    conditions = []
+    if start:
+        conditions.append(ArticleBiasDaily.day >= start)
+    if end:
+        conditions.append(ArticleBiasDaily.day <= end)
+    if author_id is not None:
+        conditions.append(ArticleBiasDaily.author_id == author_id)
+    return conditions
+
+
+def _score_counts(session: Session, conditions: List) -> Dict[int, int]:
+    rows = session.execute(
+        sa_select(ArticleBiasDaily.bias_score, func.sum(ArticleBiasDaily.articles))
+        .where(*conditions)
+        .group_by(ArticleBiasDaily.bias_score)
+    ).all()
+    return {score: int(n) for score, n in rows if n}
+
+
+def bias_histogram(
+    session: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    author_id: Optional[int] = None,
+    bucket_size: int = 10,
+) -> Dict:
+    counts = _score_counts(session, _conditions(start, end, author_id))
+
+    buckets = [
+        {"min": low, "max": min(low + bucket_size - 1, 100), "count": 0}
+        for low in range(0, 101, bucket_size)
+    ]
+    for score, n in counts.items():
+        buckets[min(max(score, 0), 100) // bucket_size]["count"] += n
+
+    return {"total": sum(counts.values()), "buckets": buckets}
+
+
+def bias_label_counts(
+    session: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    author_id: Optional[int] = None,
+) -> Dict:
+    counts = _score_counts(session, _conditions(start, end, author_id))
+
+    # Labels follow the score bands used when articles are analyzed
+    labels = {"Low": 0, "Moderate": 0, "High": 0}
+    for score, n in counts.items():
+        labels[bias_label_for_score(score)] += n
+
+    return {"total": sum(counts.values()), "labels": labels}
+
+
+def bias_trend(
+    session: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    author_id: Optional[int] = None,
+    interval: str = "day",
+) -> List[Dict]:
+    if interval not in ("day", "week"):
+        raise ValueError("interval must be 'day' or 'week'")
+
+    rows = session.execute(
+        sa_select(
+            ArticleBiasDaily.day,
+            ArticleBiasDaily.author_id,
+            func.sum(ArticleBiasDaily.articles),
+            func.sum(ArticleBiasDaily.articles * ArticleBiasDaily.bias_score),
+        )
+        .where(*_conditions(start, end, author_id))
+        .group_by(ArticleBiasDaily.day, ArticleBiasDaily.author_id)
+    ).all()
+
+    totals: Dict[Tuple[date, int], List[int]] = defaultdict(lambda: [0, 0])
+    for day, author, n, score_sum in rows:
+        if not n:
+            continue
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        if interval == "week":
+            day -= timedelta(days=day.weekday())  # weeks start on Monday
+        totals[(day, author)][0] += int(n)
+        totals[(day, author)][1] += int(score_sum)
+
+    return [
+        {
+            "period": period.isoformat(),
+            "author_id": author,
+            "articles": n,
+            "average_bias_score": round(score_sum / n, 2),
+        }
+        for (period, author), (n, score_sum) in sorted(totals.items())
+    ]
@@ -1,24 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from jose import jwt, JWTError
 from pydantic import BaseModel, EmailStr
 
-from database import engine
+from database import get_db
 from model import User
 from auth_utils import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     SECRET_KEY,
     ALGORITHM,
 )
+from dependencies import get_current_user, invalidate_principal
 from email_utils import send_reset_email
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-
 # ======================
 # SCHEMAS
 # ======================
@@ -43,57 +42,42 @@ class ResetSchema(BaseModel):
 
 
 # ======================
-# DB DEPENDENCY
+# DB HELPERS
 # ======================
-def get_db():
-    with Session(engine) as session:
-        yield session
+# The routes below are async so password hashing can be awaited in its own
+# process pool; queries still run on the threadpool.
+def find_user(db: Session, **filters) -> User | None:
+    statement = select(User)
+    for name, value in filters.items():
+        statement = statement.where(getattr(User, name) == value)
+    return db.exec(statement).first()
 
 
-# ======================
-# AUTH DEPENDENCY
-# ======================
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str | None = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    user = db.exec(select(User).where(User.email == email)).first()
-
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-
-    return user
+def save_user(db: Session, user: User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
 
 
 # ======================
 # REGISTER
 # ======================
 @router.post("/register")
-def register(data: RegisterSchema, db: Session = Depends(get_db)):
-    if db.exec(select(User).where(User.email == data.email)).first():
+async def register(data: RegisterSchema, db: Session = Depends(get_db)):
+    if await run_in_threadpool(find_user, db, email=data.email):
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    if db.exec(select(User).where(User.username == data.username)).first():
+    if await run_in_threadpool(find_user, db, username=data.username):
         raise HTTPException(status_code=400, detail="Username already exists")
 
     user = User(
         username=data.username,
         email=data.email,
-        hashed_password=hash_password(data.password),
+        hashed_password=await hash_password_async(data.password),
         role="user",
     )
 
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    await run_in_threadpool(save_user, db, user)
 
     return {"message": "User registered successfully"}
 
@@ -102,18 +86,10 @@ def register(data: RegisterSchema, db: Session = Depends(get_db)):
 # LOGIN
 # ======================
 @router.post("/login")
-def login(data: LoginSchema, db: Session = Depends(get_db)):
-    user = db.exec(select(User).where(User.email == data.email)).first()
+async def login(data: LoginSchema, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user, db, email=data.email)
 
-    print("LOGIN EMAIL:", data.email)
-    print("USER FOUND:", bool(user))
-
-    if user:
-        print("HASH IN DB:", user.hashed_password)
-        print("PASSWORD MATCH:",
-              verify_password(data.password, user.hashed_password))
-
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user or not await verify_password_async(data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_access_token({"sub": user.email})
@@ -144,22 +120,21 @@ def forgot_password(data: ForgotSchema, db: Session = Depends(get_db)):
 # RESET PASSWORD
 # ======================
 @router.post("/reset-password")
-def reset_password(data: ResetSchema, db: Session = Depends(get_db)):
+async def reset_password(data: ResetSchema, db: Session = Depends(get_db)):
     try:
         payload = jwt.decode(data.token, SECRET_KEY, algorithms=[ALGORITHM])
         email = payload.get("sub")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.exec(select(User).where(User.email == email)).first()
+    user = await run_in_threadpool(find_user, db, email=email)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.hashed_password = hash_password(data.new_password)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    user.hashed_password = await hash_password_async(data.new_password)
+    await run_in_threadpool(save_user, db, user)
+    invalidate_principal(email)
 
     return {"message": "Password reset successful"}
 
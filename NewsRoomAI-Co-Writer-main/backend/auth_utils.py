@@ -1,15 +1,23 @@
 import os
-from dotenv import load_dotenv
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
 
-load_dotenv()
+from settings import SECRET_KEY
 
-SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# pbkdf2 is deliberately slow; it runs in its own processes so a burst of
+# logins can't tie up the request threadpool
+AUTH_HASH_PROCESSES = int(os.getenv("AUTH_HASH_PROCESSES", "2"))
+# One hash running and one queued per process keeps the pool busy without a backlog
+HASH_PENDING_PER_PROCESS = 2
+
 if not SECRET_KEY:
     raise RuntimeError("SECRET_KEY not set in .env file")
 
@@ -32,3 +40,43 @@ def create_access_token(data: dict):
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+# =========================
+# HASHING POOL
+# =========================
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+# Callers wait here rather than piling work into the executor's queue. Bound to
+# the loop that first uses it, so it's created lazily rather than at import.
+_hash_slots: Optional[asyncio.Semaphore] = None
+_hash_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=AUTH_HASH_PROCESSES)
+    return _hash_pool
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+def get_hash_slots() -> asyncio.Semaphore:
+    global _hash_slots, _hash_slots_loop
+    loop = asyncio.get_running_loop()
+    if _hash_slots is None or _hash_slots_loop is not loop:
+        _hash_slots = asyncio.Semaphore(AUTH_HASH_PROCESSES * HASH_PENDING_PER_PROCESS)
+        _hash_slots_loop = loop
+    return _hash_slots
+
+async def _in_hash_pool(fn, *args):
+    async with get_hash_slots():
+        return await asyncio.get_running_loop().run_in_executor(get_hash_pool(), fn, *args)
+
+async def hash_password_async(password: str) -> str:
+    return await _in_hash_pool(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _in_hash_pool(verify_password, password, hashed)
@@ -0,0 +1,62 @@
+"""Synthetic articles for benchmarks, as pasted text and as pages for the stub fetcher."""
+import os
+import json
+import random
+from html import escape
+from typing import Dict, List
+
+SUBJECTS = ["The city council", "The ministry", "Opposition leaders", "Local residents", "The regulator"]
+VERBS = ["announced", "criticized", "approved", "questioned", "defended", "slammed"]
+OBJECTS = [
+    "the new housing plan", "a controversial budget", "the transit overhaul",
+    "emergency water rules", "the school funding formula",
+]
+DETAILS = [
+    "Officials said the measure would take effect next year.",
+    "Critics called the decision reckless and unprecedented.",
+    "Supporters argued it was long overdue.",
+    "The vote followed weeks of heated debate.",
+    "Analysts expect the costs to rise over time.",
+    "Several groups have threatened legal action.",
+]
+
+
+def make_article(index: int, paragraphs: int = 6, seed: int = 0) -> Dict[str, str]:
+    rng = random.Random(seed * 1_000_003 + index)
+    title = f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} ({index})"
+    body = []
+    for p in range(paragraphs):
+        sentences = [
+            f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} on day {index}-{p}."
+        ] + rng.sample(DETAILS, 3)
+        body.append(" ".join(sentences))
+    return {"title": title, "text": title + "\n\n" + "\n\n".join(body)}
+
+
+def make_corpus(count: int, paragraphs: int = 6, seed: int = 0) -> List[Dict[str, str]]:
+    return [make_article(i, paragraphs, seed) for i in range(count)]
+
+
+def page_url(index: int) -> str:
+    return f"https://bench.example/news/{index}"
+
+
+def write_pages(directory: str, articles: List[Dict[str, str]]):
+    """Write HTML pages plus the pages.json manifest read by fetcher.LocalTransport."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = {}
+    for index, article in enumerate(articles):
+        paragraphs = article["text"].split("\n\n")[1:]
+        html = (
+            f"<html><head><title>{escape(article['title'])}</title></head><body>"
+            f"<article><h1>{escape(article['title'])}</h1>"
+            + "".join(f"<p>{escape(p)}</p>" for p in paragraphs)
+            + "</article></body></html>"
+        )
+        name = f"{index}.html"
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        manifest[page_url(index)] = name
+
+    with open(os.path.join(directory, "pages.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
@@ -0,0 +1,323 @@
+"""Offline load test: stub LLM + stub article pages + the real app.
+
+    python -m bench.run --concurrency 16 --requests 200
+    python -m bench.run --scenarios analyze,rewrite --compare latest
+
+Run from backend/. Starts the stub LLM and uvicorn on free ports with a
+throwaway SQLite database, seeds some articles, then drives each scenario
+and prints p50/p95/p99 latency and requests per second. Results are written
+to bench/results/ as JSON; --compare reports the change against an earlier
+run and exits non-zero if p95 regressed by more than --max-regression.
+"""
+import os
+import sys
+import json
+import time
+import math
+import glob
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.corpus import make_corpus, page_url, write_pages
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+SCENARIOS = ["analyze", "analyze_link", "rewrite", "articles", "download_pdf"]
+
+
+# =========================
+# PROCESSES
+# =========================
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(cmd: List[str], env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready in {timeout}s")
+
+
+def app_env(workdir: str, llm_url: str, args) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "SECRET_KEY": env.get("SECRET_KEY", "bench-secret"),
+        "LLM_API_KEY": "bench",
+        "LLM_BASE_URL": llm_url,
+        "FETCH_TRANSPORT": f"local:{os.path.join(workdir, 'pages')}",
+        "FETCH_CACHE_DIR": os.path.join(workdir, "fetch_cache"),
+        "PDF_CACHE_DIR": os.path.join(workdir, "pdf_cache"),
+        "JOB_INPROCESS_WORKERS": "0",
+        # The stub has no quota; only measure the app's own limits
+        "LLM_REQUESTS_PER_MINUTE": env.get("LLM_REQUESTS_PER_MINUTE", "1000000"),
+        "LLM_TOKENS_PER_MINUTE": env.get("LLM_TOKENS_PER_MINUTE", "1000000000"),
+    })
+    return env
+
+
+# =========================
+# LOAD
+# =========================
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    build: Callable[[int], Tuple[str, str, Optional[Dict]]],
+    requests: int,
+    concurrency: int,
+) -> Dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            method, path, body = build(i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                await response.aread()
+                ok = response.status_code < 400
+                reason = str(response.status_code)
+            except httpx.HTTPError as e:
+                ok, reason = False, type(e).__name__
+            elapsed = time.perf_counter() - started
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors[reason] = errors.get(reason, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "max": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        },
+    }
+
+
+async def run_scenarios(app_url: str, args, corpus: List[Dict[str, str]]) -> Dict[str, Dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=args.timeout) as client:
+        # Seed articles for the read and rewrite scenarios; not measured
+        seeded = []
+        for article in corpus[:args.seed]:
+            response = await client.post("/analyze", json={"text": article["text"]})
+            response.raise_for_status()
+            seeded.append(response.json()["id"])
+
+        # Every analyze request gets an unseen article so caches don't hide the LLM cost
+        fresh = corpus[args.seed:]
+        builders = {
+            "analyze": lambda i: ("POST", "/analyze", {"text": fresh[i]["text"]}),
+            "analyze_link": lambda i: ("POST", "/analyze", {"link": page_url(args.seed + args.requests + i)}),
+            "rewrite": lambda i: ("POST", "/rewrite", {
+                "article_id": seeded[i % len(seeded)],
+                "text": f"{corpus[i % args.seed]['text']}\n\nRevision {i}.",
+            }),
+            "articles": lambda i: ("GET", "/articles?limit=50&fields=id,title,bias_score,created_at", None),
+            "download_pdf": lambda i: ("GET", f"/articles/{seeded[i % len(seeded)]}/download_pdf", None),
+        }
+
+        results = {}
+        for name in args.scenarios:
+            results[name] = await drive(client, builders[name], args.requests, args.concurrency)
+            print_scenario(name, results[name])
+        return results
+
+
+# =========================
+# REPORTING
+# =========================
+
+def print_scenario(name: str, result: Dict):
+    latency = result["latency_ms"]
+    errors = sum(result["errors"].values())
+    print(
+        f"{name:<14} {result['rps']:>9.2f} rps  "
+        f"p50 {latency['p50']:>9.2f}ms  p95 {latency['p95']:>9.2f}ms  p99 {latency['p99']:>9.2f}ms  "
+        f"errors {errors}"
+    )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(report: Dict, label: Optional[str]) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    name = "-".join(part for part in (stamp, report["git_commit"], label) if part)
+    path = os.path.join(RESULTS_DIR, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def load_baseline(spec: str, exclude: str) -> Optional[Dict]:
+    if spec == "latest":
+        paths = sorted(p for p in glob.glob(os.path.join(RESULTS_DIR, "*.json")) if p != exclude)
+        if not paths:
+            return None
+        spec = paths[-1]
+    with open(spec, encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline["path"] = spec
+    return baseline
+
+
+def compare(report: Dict, baseline: Dict, max_regression: float) -> bool:
+    print(f"\nvs {os.path.basename(baseline['path'])} ({baseline.get('git_commit')})")
+    ok = True
+    for name, result in report["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        p95, before_p95 = result["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        change = (p95 - before_p95) / before_p95 * 100 if before_p95 else 0.0
+        rps_change = (result["rps"] - before["rps"]) / before["rps"] * 100 if before["rps"] else 0.0
+        regressed = change > max_regression
+        ok = ok and not regressed
+        print(
+            f"{name:<14} p95 {before_p95:>9.2f} -> {p95:>9.2f}ms ({change:+6.1f}%)  "
+            f"rps {rps_change:+6.1f}%{'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+# =========================
+# CLI
+# =========================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark for the NewsRoom API")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--seed", type=int, default=20, help="articles created before measuring")
+    parser.add_argument("--paragraphs", type=int, default=6, help="paragraphs per synthetic article")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="stub seconds before first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0, help="stub generation speed; 0 = instant")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--label", help="suffix for the results file")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", help="results file to compare against, or 'latest'")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed p95 increase in percent")
+    args = parser.parse_args()
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.seed = max(1, args.seed)
+
+    corpus = make_corpus(args.seed + 2 * args.requests, args.paragraphs)
+    workdir = tempfile.mkdtemp(prefix="newsroom-bench-")
+    write_pages(os.path.join(workdir, "pages"), corpus)
+
+    llm_port, app_port = free_port(), free_port()
+    llm_url, app_url = f"http://127.0.0.1:{llm_port}", f"http://127.0.0.1:{app_port}"
+
+    processes = []
+    try:
+        processes.append(start([
+            sys.executable, "-m", "bench.stub_llm", "--port", str(llm_port),
+            "--latency", str(args.llm_latency), "--tokens-per-second", str(args.llm_tokens_per_second),
+        ], dict(os.environ), os.path.join(workdir, "stub_llm.log")))
+        wait_ready(f"{llm_url}/calls", processes[-1])
+
+        processes.append(start([
+            sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ], app_env(workdir, f"{llm_url}/v1", args), os.path.join(workdir, "app.log")))
+        wait_ready(f"{app_url}/startup/report", processes[-1])
+
+        print(f"workdir {workdir}")
+        scenarios = asyncio.run(run_scenarios(app_url, args, corpus))
+        llm_calls = httpx.get(f"{llm_url}/calls").json()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    report = {
+        "git_commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "concurrency", "requests", "seed", "paragraphs", "workers",
+                "llm_latency", "llm_tokens_per_second",
+            )
+        },
+        "llm_calls": llm_calls,
+        "scenarios": scenarios,
+    }
+
+    path = None
+    if not args.no_save:
+        path = save_results(report, args.label)
+        print(f"\nsaved {os.path.relpath(path, BACKEND_DIR)}")
+
+    if args.compare:
+        baseline = load_baseline(args.compare, exclude=path)
+        if baseline is None:
+            print("no earlier results to compare against")
+        elif not compare(report, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""OpenAI-compatible stand-in for benchmarks.
+
+    python -m bench.stub_llm --port 8765 --latency 0.4 --tokens-per-second 80
+
+Answers /v1/chat/completions with canned output shaped like the prompt it
+receives (full, fast or deep analysis, or a neutral rewrite), after a fixed
+first-token latency plus a per-token delay. Supports streaming and reports usage.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import hashlib
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+LATENCY_SECONDS = float(os.getenv("STUB_LLM_LATENCY", "0.3"))
+TOKENS_PER_SECOND = float(os.getenv("STUB_LLM_TOKENS_PER_SECOND", "0"))  # 0 = instant
+STREAM_CHUNK_CHARS = 16
+
+app = FastAPI()
+calls = {"total": 0, "stream": 0}
+
+DEEP_ANALYSIS = {
+    "PASSIONIT": {
+        name: f"{name} assessment of the governance response."
+        for name in (
+            "Probing", "Innovating", "Acting", "Scoping", "Setting",
+            "Owning", "Nurturing", "Integrated", "Transformation",
+        )
+    },
+    "PRUTL": {
+        name: f"{name} reading of the article."
+        for name in ("Positive_Soul", "Negative_Soul", "Positive_Materialism", "Negative_Materialism")
+    },
+    "governance_soul_culture": {
+        "Governance_Father": "Institutional framing.",
+        "Soul_Son": "Individual framing.",
+        "Culture_Spirit": "Cultural framing.",
+    },
+    "kalki_aidharma": "Civilizational interpretation of the events described.",
+}
+
+
+def _score(text: str) -> int:
+    # Deterministic per article so repeated runs produce the same data
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:4], 16) % 101
+
+
+def _label(score: int) -> str:
+    return "Low" if score < 34 else "Moderate" if score < 67 else "High"
+
+
+def completion_text(messages) -> str:
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+
+    if "neutral news editor" in system:
+        return "\n\n".join(
+            "Neutral: " + " ".join(paragraph.split())
+            for paragraph in user.split("\n\n")
+            if paragraph.strip()
+        )
+
+    if '"bias_score"' not in system:
+        return json.dumps(DEEP_ANALYSIS)
+
+    score = _score(user)
+    result = {
+        "bias_score": score,
+        "bias_label": _label(score),
+        "summary": "A neutral summary of the article in three sentences. "
+                   "It states who did what. It avoids loaded wording.",
+        "perspectives": ["Government perspective", "Opposition perspective", "Public perspective"],
+        "explanation": "Framing relies on a few loaded verbs and unattributed claims.",
+    }
+    if '"deep_analysis"' in system:
+        result["deep_analysis"] = DEEP_ANALYSIS
+    return json.dumps(result, indent=2)
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _usage(messages, text: str):
+    prompt = sum(_tokens(m.get("content") or "") for m in messages)
+    completion = _tokens(text)
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+@app.get("/calls")
+def get_calls():
+    return calls
+
+
+@app.post("/v1/chat/completions")
+async def chat(request: Request):
+    body = await request.json()
+    calls["total"] += 1
+    messages = body.get("messages", [])
+    text = completion_text(messages)
+    model = body.get("model", "stub")
+
+    await asyncio.sleep(LATENCY_SECONDS)
+
+    if not body.get("stream"):
+        if TOKENS_PER_SECOND:
+            await asyncio.sleep(_tokens(text) / TOKENS_PER_SECOND)
+        return {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": _usage(messages, text),
+        }
+
+    calls["stream"] += 1
+    include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+    async def events():
+        for i in range(0, len(text), STREAM_CHUNK_CHARS):
+            piece = text[i:i + STREAM_CHUNK_CHARS]
+            if TOKENS_PER_SECOND:
+                await asyncio.sleep(_tokens(piece) / TOKENS_PER_SECOND)
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        if include_usage:
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": _usage(messages, text),
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=LATENCY_SECONDS, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=TOKENS_PER_SECOND, help="0 disables the delay")
+    args = parser.parse_args()
+
+    LATENCY_SECONDS = args.latency
+    TOKENS_PER_SECOND = args.tokens_per_second
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,177 @@
+import os
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlmodel import Session
+
+from database import engine
+from model import CachedResult
+
+
+CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+CACHE_DB_TTL_SECONDS = int(os.getenv("RESULT_CACHE_DB_TTL_SECONDS", str(30 * 86400)))
+CACHE_DB_ENABLED = os.getenv("RESULT_CACHE_DB", "1") != "0"
+
+
+def normalize_text(text: str) -> str:
+    # Pasted copies differ in line endings, indentation and blank lines
+    text = unicodedata.normalize("NFC", text or "")
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+def prompt_version(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def make_key(namespace: str, text: str, version: str, model: str, temperature: float) -> str:
+    payload = json.dumps(
+        [namespace, version, model, temperature, normalize_text(text)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResultCache:
+    """Two-tier cache for LLM results: in-process LRU in front of the database."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.memory = LRUCache(max_entries, ttl_seconds)
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace: str, field: str):
+        with self._lock:
+            stats = self._stats.setdefault(
+                namespace, {"memory_hits": 0, "db_hits": 0, "misses": 0}
+            )
+            stats[field] += 1
+
+    def _db_get(self, key: str):
+        with Session(engine) as session:
+            row = session.get(CachedResult, key)
+            if row is None:
+                return None
+            if row.expires_at and row.expires_at < datetime.utcnow():
+                session.delete(row)
+                session.commit()
+                return None
+            return row.value
+
+    def _db_set(self, key: str, namespace: str, value: Any):
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            row = session.get(CachedResult, key) or CachedResult(key=key, namespace=namespace)
+            row.value = value
+            row.created_at = now
+            row.expires_at = now + timedelta(seconds=CACHE_DB_TTL_SECONDS)
+            session.add(row)
+            session.commit()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(namespace, "memory_hits")
+            return value
+
+        if CACHE_DB_ENABLED:
+            value = self._db_get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                self._count(namespace, "db_hits")
+                return value
+
+        self._count(namespace, "misses")
+        return None
+
+    def set(self, namespace: str, key: str, value: Any):
+        self.memory.set(key, value)
+        if CACHE_DB_ENABLED:
+            self._db_set(key, namespace, value)
+
+    async def aget_or_compute(
+        self,
+        namespace: str,
+        text: str,
+        version: str,
+        model: str,
+        temperature: float,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        key = make_key(namespace, text, version, model, temperature)
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(namespace, "memory_hits")
+            return value
+
+        value = await asyncio.to_thread(self.get, namespace, key)
+        if value is None:
+            value = await compute()
+            await asyncio.to_thread(self.set, namespace, key, value)
+        return value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            namespaces = {name: dict(counts) for name, counts in self._stats.items()}
+
+        for counts in namespaces.values():
+            lookups = counts["memory_hits"] + counts["db_hits"] + counts["misses"]
+            hits = counts["memory_hits"] + counts["db_hits"]
+            counts["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+
+        return {
+            "memory_entries": len(self.memory),
+            "memory_max_entries": self.memory.max_entries,
+            "memory_ttl_seconds": self.memory.ttl_seconds,
+            "db_enabled": CACHE_DB_ENABLED,
+            "namespaces": namespaces,
+        }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,65 @@
+import re
+from typing import List
+
+# Rough size of an English token for gpt-4o-family tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_paragraphs(text: str) -> List[str]:
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text)]
+    if len(paragraphs) == 1:
+        # Scraped text often uses single newlines between paragraphs
+        paragraphs = [p.strip() for p in text.split("\n")]
+    return [p for p in paragraphs if p]
+
+
+def _split_oversized(paragraph: str, budget: int) -> List[str]:
+    sentences = re.split(r"(?<=[.!?])\s+", paragraph)
+    pieces, current = [], ""
+    for sentence in sentences:
+        while estimate_tokens(sentence) > budget:
+            cut = budget * CHARS_PER_TOKEN
+            cut = sentence.rfind(" ", 0, cut) if " " in sentence[:cut] else cut
+            head, sentence = sentence[:cut], sentence[cut:].lstrip()
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(head)
+        candidate = f"{current} {sentence}".strip()
+        if current and estimate_tokens(candidate) > budget:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, budget: int) -> List[str]:
+    """Pack whole paragraphs into chunks of at most ``budget`` estimated tokens."""
+    if estimate_tokens(text) <= budget:
+        return [text]
+
+    chunks, current = [], []
+    current_tokens = 0
+    for paragraph in split_paragraphs(text):
+        pieces = (
+            _split_oversized(paragraph, budget)
+            if estimate_tokens(paragraph) > budget else [paragraph]
+        )
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > budget:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
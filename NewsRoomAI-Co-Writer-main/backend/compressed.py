@@ -0,0 +1,79 @@
+import os
+import json
+import zlib
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # zlib fallback keeps the column readable without the extra wheel
+    zstandard = None
+
+# Tagged so readers can tell codecs apart and pass legacy plain values through
+ZSTD_MAGIC = b"\x00zs1"
+ZLIB_MAGIC = b"\x00zl1"
+
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+# Tiny values aren't worth the codec overhead
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "256"))
+
+_zstd_compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL) if zstandard else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+def compress(data: bytes) -> bytes:
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return data
+    if _zstd_compressor:
+        return ZSTD_MAGIC + _zstd_compressor.compress(data)
+    return ZLIB_MAGIC + zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def decompress(data: bytes) -> bytes:
+    if data.startswith(ZSTD_MAGIC):
+        if not _zstd_decompressor:
+            raise RuntimeError("zstandard is required to read this column")
+        return _zstd_decompressor.decompress(data[len(ZSTD_MAGIC):])
+    if data.startswith(ZLIB_MAGIC):
+        return zlib.decompress(data[len(ZLIB_MAGIC):])
+    return data
+
+
+def plain_text(value):
+    """Decode a CompressedText column value; registered as an SQL function on SQLite."""
+    if value is None or isinstance(value, str):
+        return value
+    return decompress(bytes(value)).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as compressed bytes; rows written before compression read as-is."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress(value.encode("utf-8"))
+
+    def process_result_value(self, value, dialect):
+        return plain_text(value)
+
+
+class CompressedJSON(TypeDecorator):
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, (dict, list)):
+            return value
+        if isinstance(value, str):
+            return json.loads(value)
+        return json.loads(decompress(bytes(value)))
@@ -1,19 +1,300 @@
 import os
-from dotenv import load_dotenv
-from sqlmodel import SQLModel, create_engine
+import hashlib
+from datetime import datetime
+from typing import Iterator
 
-# Load environment variables
-load_dotenv()
+from sqlalchemy import LargeBinary, bindparam, event, insert, inspect, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import Session, SQLModel, create_engine
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+from settings import DATABASE_URL, DB_CREATE_TABLES, SQL_ECHO
+from compressed import CompressedJSON, CompressedText, plain_text
+from metrics import COLLECTORS, Gauge, instrument_engine
+from model import AppMeta
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in .env file")
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=True  # keep ON while learning
-)
+# =========================
+# ENGINE PROFILES
+# =========================
+
+# SQLite allows one writer at a time, so sqlite-prod keeps a fixed pool and
+# relies on WAL + busy_timeout to queue writers instead of failing them.
+PROFILES = {
+    "dev": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "statement_timeout_ms": 0,
+        "busy_timeout_ms": 5000,
+        "sqlite_synchronous": None,
+    },
+    "sqlite-prod": {
+        "pool_size": 8,
+        "max_overflow": 0,
+        "pool_timeout": 30,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "statement_timeout_ms": 0,
+        "busy_timeout_ms": 15000,
+        "sqlite_synchronous": "NORMAL",  # safe with WAL; fsync only at checkpoints
+    },
+    "postgres-prod": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 30000,
+        "busy_timeout_ms": 0,
+        "sqlite_synchronous": None,
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "dev")
+if DB_PROFILE not in PROFILES:
+    raise ValueError(f"DB_PROFILE must be one of: {', '.join(PROFILES)}")
+
+
+def profile_settings(name: str) -> dict:
+    settings = dict(PROFILES[name])
+    overrides = {
+        "pool_size": ("DB_POOL_SIZE", int),
+        "max_overflow": ("DB_MAX_OVERFLOW", int),
+        "pool_timeout": ("DB_POOL_TIMEOUT", float),
+        "pool_recycle": ("DB_POOL_RECYCLE", int),
+        "pool_pre_ping": ("DB_POOL_PRE_PING", lambda value: value == "1"),
+        "statement_timeout_ms": ("DB_STATEMENT_TIMEOUT_MS", int),
+        "busy_timeout_ms": ("DB_BUSY_TIMEOUT_MS", int),
+    }
+    for key, (env, parse) in overrides.items():
+        if os.getenv(env):
+            settings[key] = parse(os.environ[env])
+    return settings
+
+
+def engine_options(url: str, settings: dict) -> dict:
+    url = make_url(url)
+    options = {"echo": SQL_ECHO}  # per-statement timings are in /metrics; echo is for local debugging
+    connect_args = {}
+
+    if url.get_backend_name() == "sqlite":
+        # busy_timeout is set per connection below; the driver default would override it
+        connect_args["timeout"] = settings["busy_timeout_ms"] / 1000
+        if url.database in (None, "", ":memory:"):
+            # In-memory databases live in a single connection; pool sizing doesn't apply
+            return {**options, "connect_args": connect_args}
+    elif url.get_backend_name() == "postgresql":
+        if settings["statement_timeout_ms"]:
+            connect_args["options"] = f"-c statement_timeout={settings['statement_timeout_ms']}"
+        connect_args["application_name"] = "newsroom"
+
+    options.update(
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+        pool_pre_ping=settings["pool_pre_ping"],
+        connect_args=connect_args,
+    )
+    return options
+
+
+def configure_sqlite(engine, settings: dict):
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers proceed while a writer holds the lock
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings['busy_timeout_ms'])}")
+        if settings["sqlite_synchronous"]:
+            cursor.execute(f"PRAGMA synchronous={settings['sqlite_synchronous']}")
+        cursor.close()
+        # Lets SQL (the search index triggers) read compressed article text
+        dbapi_connection.create_function("newsroom_text", 1, plain_text, deterministic=True)
+
+
+DB_SETTINGS = profile_settings(DB_PROFILE)
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, DB_SETTINGS))
+if engine.dialect.name == "sqlite":
+    configure_sqlite(engine, DB_SETTINGS)
+instrument_engine(engine)
+
+
+# =========================
+# SESSIONS
+# =========================
+
+def get_db() -> Iterator[Session]:
+    """Request-scoped session; FastAPI closes it once the response is built."""
+    with Session(engine) as session:
+        yield session
+
+
+def add_missing_columns(inspector, tables):
+    """ALTER TABLE ... ADD COLUMN for nullable model columns an older schema lacks."""
+    with engine.begin() as conn:
+        for table in tables:
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if not column.nullable:
+                    raise RuntimeError(
+                        f"{table.name}.{column.name} is missing and NOT NULL; add it with a migration"
+                    )
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+
+
+def add_missing_indexes(tables):
+    # create_all skips tables that already exist, and with them any index
+    # added to the model later (e.g. the Article pagination/filter indexes)
+    with engine.begin() as conn:
+        for table in tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+COMPRESSED_BACKFILL_BATCH = 500
+
+
+def legacy_compressed_columns(inspector, tables):
+    """Compressed model columns that the database still declares as text/JSON."""
+    if engine.dialect.name == "sqlite":
+        # SQLite keeps whatever bytes it is given regardless of the declared type
+        return []
+    legacy = []
+    for table in tables:
+        reflected = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if not isinstance(column.type, (CompressedText, CompressedJSON)):
+                continue
+            if column.name in reflected and not isinstance(reflected[column.name], LargeBinary):
+                legacy.append((table, column))
+    return legacy
+
+
+def migrate_compressed_columns(columns):
+    """Convert legacy text/JSON columns to binary, then compress the existing rows."""
+    for table, column in columns:
+        binary = LargeBinary().compile(dialect=engine.dialect)
+        with engine.begin() as conn:
+            # Plain UTF-8 bytes carry no codec tag, so readers pass them through as-is
+            conn.exec_driver_sql(
+                f'ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE {binary} '
+                f"USING convert_to({column.name}::text, 'UTF8')"
+            )
+
+        [pk] = table.primary_key.columns
+        last = None
+        while True:
+            with engine.begin() as conn:
+                query = select(pk, column).where(column.is_not(None)).order_by(pk)
+                if last is not None:
+                    query = query.where(pk > last)
+                rows = conn.execute(query.limit(COMPRESSED_BACKFILL_BATCH)).all()
+                if not rows:
+                    break
+                # Reading decoded the plain bytes; writing runs them through the codec
+                conn.execute(
+                    update(table)
+                    .where(pk == bindparam("row_id"))
+                    .values({column.name: bindparam("value")}),
+                    [{"row_id": key, "value": value} for key, value in rows],
+                )
+                last = rows[-1][0]
+
+
+SCHEMA_VERSION_KEY = "schema_version"
+
+
+def schema_version() -> str:
+    """Fingerprint of the model DDL; changes whenever a table, column or index does."""
+    digest = hashlib.sha256()
+    for table in SQLModel.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode("utf-8"))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def stored_schema_version():
+    table = AppMeta.__table__
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(table.c.value).where(table.c.key == SCHEMA_VERSION_KEY)
+            ).scalar()
+    except DBAPIError:
+        # No appmeta table yet
+        return None
+
+
+def record_schema_version(version: str):
+    table = AppMeta.__table__
+    values = {"value": version, "updated_at": datetime.utcnow()}
+    try:
+        with engine.begin() as conn:
+            updated = conn.execute(
+                update(table).where(table.c.key == SCHEMA_VERSION_KEY).values(**values)
+            ).rowcount
+            if not updated:
+                conn.execute(insert(table).values(key=SCHEMA_VERSION_KEY, **values))
+    except IntegrityError:
+        # Another process recorded the version first
+        pass
+
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    # A schema already checked by this build needs no catalog queries at all
+    version = schema_version()
+    if stored_schema_version() == version:
+        return
+
+    # One catalog query instead of a has_table round trip per model
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    upgraded = [t for t in SQLModel.metadata.sorted_tables if t.name in existing]
+    legacy = legacy_compressed_columns(inspector, upgraded)
+
+    if DB_CREATE_TABLES == "0":
+        if legacy:
+            names = ", ".join(f"{t.name}.{c.name}" for t, c in legacy)
+            raise RuntimeError(
+                f"{names} must be converted to binary before this version can write to them; "
+                "start once with DB_CREATE_TABLES=1 or migrate them by hand"
+            )
+        return
+
+    missing = [t for t in SQLModel.metadata.sorted_tables if t.name not in existing]
+    if missing:
+        SQLModel.metadata.create_all(engine, tables=missing)
+    add_missing_columns(inspector, upgraded)
+    migrate_compressed_columns(legacy)
+    add_missing_indexes(upgraded)
+    record_schema_version(version)
+
+
+# =========================
+# POOL METRICS
+# =========================
+
+db_pool_checked_out = Gauge("newsroom_db_pool_checked_out", "Database connections currently in use.")
+db_pool_overflow = Gauge("newsroom_db_pool_overflow", "Connections open beyond pool_size.")
+
+
+def _collect_pool():
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        db_pool_checked_out.set(pool.checkedout())
+        db_pool_overflow.set(max(pool.overflow(), 0))
+
+
+COLLECTORS.append(_collect_pool)
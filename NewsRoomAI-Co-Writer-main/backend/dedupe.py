@@ -0,0 +1,186 @@
+import os
+import hashlib
+import random
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.orm import undefer
+from sqlmodel import Session, select
+
+from database import engine
+from model import Article, ArticleFingerprint, ArticleLSHBucket
+from startup import timed_lazy_import
+
+DEDUPE_ENABLED = os.getenv("DEDUPE_ENABLED", "1") != "0"
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.9"))
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+# 16 bands x 8 rows: a pair becomes a candidate with probability
+# 1 - (1 - J^8)^16, i.e. ~0.9999 at J=0.9, 0.95 at 0.8 and only 0.61 at 0.7.
+# Fine for the default DEDUPE_THRESHOLD; lower thresholds lose recall.
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)
+]
+# Bounds the (shingles x permutations) matrix for very long articles
+SIGNATURE_BLOCK = 2048
+
+
+# =========================
+# MINHASH
+# =========================
+
+def shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def _hash(shingle: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big"
+    )
+
+
+@lru_cache(maxsize=1)
+def _permutation_arrays():
+    with timed_lazy_import("numpy"):
+        import numpy as np
+    a = np.array([a for a, _ in _PERMUTATIONS], dtype=np.uint64)
+    b = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)
+    return np, a >> np.uint64(32), a & np.uint64(_MAX_HASH), b
+
+
+def _mod_prime(np, x):
+    # x mod 2^61-1 without overflow, for any x below 2^64
+    prime = np.uint64(_PRIME)
+    x = (x & prime) + (x >> np.uint64(61))
+    return np.where(x >= prime, x - prime, x)
+
+
+@lru_cache(maxsize=256)
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """Same values as min((a * h + b) % _PRIME) per permutation, in uint64 numpy.
+
+    a is split at 32 bits so every product fits in 64 bits; stored
+    signatures stay comparable with ones computed before.
+    """
+    hashes = [_hash(s) for s in shingles(text)]
+    if not hashes:
+        return ()
+
+    np, a_hi, a_lo, b = _permutation_arrays()
+    signature = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), SIGNATURE_BLOCK):
+        h = np.array(hashes[start:start + SIGNATURE_BLOCK], dtype=np.uint64)[:, None]
+        low = _mod_prime(np, a_lo * h)
+        # a_hi * h * 2^32 with 2^61 = 1 (mod p): split a_hi * h at 29 bits
+        high = a_hi * h
+        high = (high >> np.uint64(29)) + ((high & np.uint64((1 << 29) - 1)) << np.uint64(32))
+        values = _mod_prime(np, _mod_prime(np, low + high) + b)
+        np.minimum(signature, values.min(axis=0), out=signature)
+    return tuple(int(v) & _MAX_HASH for v in signature)
+
+
+def similarity(sig_a, sig_b) -> float:
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def lsh_buckets(signature) -> List[str]:
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(
+            ",".join(map(str, rows)).encode("ascii"), digest_size=8
+        ).hexdigest()
+        buckets.append(f"{band}:{digest}")
+    return buckets
+
+
+# =========================
+# INDEX MAINTENANCE
+# =========================
+
+def fingerprint_article(session: Session, article: Article, duplicate_of: int | None = None):
+    # Runs inside the caller's transaction, like search.index_article
+    if not DEDUPE_ENABLED:
+        return
+
+    remove_fingerprint(session, article.id, keep_link=True)
+
+    signature = minhash_signature(article.content or "")
+    fingerprint = session.get(ArticleFingerprint, article.id)
+    if fingerprint is None:
+        fingerprint = ArticleFingerprint(article_id=article.id, duplicate_of=duplicate_of)
+    fingerprint.signature = list(signature)
+    session.add(fingerprint)
+
+    if signature:
+        session.add_all(
+            ArticleLSHBucket(bucket=bucket, article_id=article.id)
+            for bucket in lsh_buckets(signature)
+        )
+
+
+def remove_fingerprint(session: Session, article_id: int, keep_link: bool = False):
+    session.execute(delete(ArticleLSHBucket).where(ArticleLSHBucket.article_id == article_id))
+    if not keep_link:
+        session.execute(
+            delete(ArticleFingerprint).where(ArticleFingerprint.article_id == article_id)
+        )
+
+
+# =========================
+# LOOKUP
+# =========================
+
+def find_near_duplicate(text: str) -> Optional[Tuple[int, float]]:
+    if not DEDUPE_ENABLED:
+        return None
+
+    signature = minhash_signature(text)
+    if not signature:
+        return None
+
+    with Session(engine) as session:
+        candidates = session.exec(
+            select(ArticleFingerprint)
+            .join(ArticleLSHBucket, ArticleLSHBucket.article_id == ArticleFingerprint.article_id)
+            .where(ArticleLSHBucket.bucket.in_(lsh_buckets(signature)))
+            .distinct()
+        ).all()
+
+    best = None
+    for candidate in candidates:
+        score = similarity(signature, candidate.signature)
+        if score >= DEDUPE_THRESHOLD and (best is None or score > best[1]):
+            best = (candidate.article_id, score)
+
+    return best
+
+
+def reused_analysis(article_id: int) -> Optional[Dict]:
+    with Session(engine) as session:
+        article = session.get(Article, article_id, options=[undefer(Article.deep_analysis)])
+        if not article:
+            return None
+        return {
+            "bias_score": article.bias_score,
+            "summary": article.summary,
+            "perspectives": article.perspectives,
+            "explanation": article.explanation,
+            "deep_analysis": article.deep_analysis,
+        }
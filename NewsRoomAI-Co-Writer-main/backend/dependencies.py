@@ -1,36 +1,50 @@
-from fastapi import Depends, HTTPException, status
+import os
+
+from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlmodel import Session, select
-from database import engine
+
+from database import get_db
 from model import User
-import os
+from cache import LRUCache
+from auth_utils import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
+# Authenticated users keyed by token subject. Each process has its own copy,
+# so a change made elsewhere is seen here after at most the TTL.
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+principal_cache = LRUCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_principal(email: str):
+    principal_cache.delete(email)
 
-def get_db():
-    with Session(engine) as session:
-        yield session
 
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
-):
+) -> User:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
+        email: str | None = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    cached = principal_cache.get(email)
+    if cached is not None:
+        # A copy per request so handlers can't change the cached entry
+        return User.model_validate(cached)
+
     user = db.exec(select(User).where(User.email == email)).first()
 
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
+    principal_cache.set(email, user.model_dump())
     return user
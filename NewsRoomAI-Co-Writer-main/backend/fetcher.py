@@ -0,0 +1,303 @@
+import os
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+FETCH_CACHE_DIR = os.getenv(
+    "FETCH_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".fetch_cache")
+)
+# Within this window a cached page is served without revalidating
+FETCH_CACHE_FRESH_SECONDS = int(os.getenv("FETCH_CACHE_FRESH_SECONDS", "600"))
+# Pages are only worth revalidating for so long; past this they are deleted
+FETCH_CACHE_MAX_AGE_SECONDS = int(os.getenv("FETCH_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+FETCH_CACHE_MAX_ENTRIES = int(os.getenv("FETCH_CACHE_MAX_ENTRIES", "5000"))
+# Eviction scans the directory, so it runs at most this often per process
+FETCH_CACHE_PRUNE_SECONDS = int(os.getenv("FETCH_CACHE_PRUNE_SECONDS", "300"))
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "15"))
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "4"))
+FETCH_POOL_SIZE = int(os.getenv("FETCH_POOL_SIZE", "32"))
+FETCH_TRANSPORT = os.getenv("FETCH_TRANSPORT", "http")
+FETCH_USER_AGENT = os.getenv(
+    "FETCH_USER_AGENT",
+    "Mozilla/5.0 (compatible; NewsRoomAI/1.0; +http://localhost)",
+)
+
+# Matched exactly, except for the utm_* family; a prefix match would also drop
+# real parameters such as "reference" or "refresh"
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid"})
+TRACKING_PREFIXES = ("utm_",)
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    """Cache and dedupe key for a URL; requests still go to the URL as given."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if parts.port and not (
+        (scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)
+    ):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(k)
+    )
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+# =========================
+# TRANSPORTS
+# =========================
+
+@dataclass
+class FetchResponse:
+    status: int
+    body: str = ""
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class RequestsTransport:
+    """Pooled keep-alive HTTP transport."""
+
+    def __init__(self, pool_size: int = FETCH_POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = FETCH_USER_AGENT
+
+    def get(self, url: str, headers: Dict[str, str], timeout: float) -> FetchResponse:
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        return FetchResponse(
+            status=response.status_code,
+            body=response.text if response.status_code == 200 else "",
+            headers={k.lower(): v for k, v in response.headers.items()},
+        )
+
+
+class LocalTransport:
+    """Serves pages from memory or a directory, for offline tests and benchmarks.
+
+    A directory must contain ``pages.json`` mapping URLs to HTML file names.
+    ETags are derived from the page body so conditional GETs behave like a real server.
+    """
+
+    def __init__(self, pages: Optional[Dict[str, str]] = None, directory: Optional[str] = None):
+        self.pages = {canonical_url(u): html for u, html in (pages or {}).items()}
+        self.directory = directory
+        self.requests = 0
+        if directory:
+            with open(os.path.join(directory, "pages.json"), encoding="utf-8") as f:
+                self.manifest = {canonical_url(u): name for u, name in json.load(f).items()}
+        else:
+            self.manifest = {}
+
+    def _body(self, url: str) -> Optional[str]:
+        key = canonical_url(url)
+        if key in self.pages:
+            return self.pages[key]
+        if key in self.manifest:
+            with open(os.path.join(self.directory, self.manifest[key]), encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def get(self, url: str, headers: Dict[str, str], timeout: float) -> FetchResponse:
+        self.requests += 1
+        body = self._body(url)
+        if body is None:
+            return FetchResponse(status=404)
+
+        etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:16] + '"'
+        if headers.get("If-None-Match") == etag:
+            return FetchResponse(status=304, headers={"etag": etag})
+        return FetchResponse(status=200, body=body, headers={"etag": etag})
+
+
+def transport_from_env(spec: str = FETCH_TRANSPORT):
+    # "http" or "local:/path/to/pages"
+    if spec.startswith("local:"):
+        return LocalTransport(directory=spec.split(":", 1)[1])
+    return RequestsTransport()
+
+
+# =========================
+# FETCHER
+# =========================
+
+def extract_article(url: str, html: str) -> Tuple[str, str]:
+    from newspaper import Article
+
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.title, article.text
+
+
+class ArticleFetcher:
+    def __init__(
+        self,
+        transport=None,
+        cache_dir: Optional[str] = FETCH_CACHE_DIR,
+        timeout: float = FETCH_TIMEOUT_SECONDS,
+        per_host_limit: int = FETCH_PER_HOST_LIMIT,
+        fresh_seconds: int = FETCH_CACHE_FRESH_SECONDS,
+        max_age_seconds: int = FETCH_CACHE_MAX_AGE_SECONDS,
+        max_entries: int = FETCH_CACHE_MAX_ENTRIES,
+    ):
+        self.transport = transport or transport_from_env()
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.per_host_limit = per_host_limit
+        self.fresh_seconds = fresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self._last_prune = 0.0
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return (
+            os.path.join(self.cache_dir, f"{name}.json"),
+            os.path.join(self.cache_dir, f"{name}.html"),
+        )
+
+    def _read_cache(self, key: str) -> Optional[Dict]:
+        if not self.cache_dir:
+            return None
+        meta_path, _ = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, key: str, meta: Dict, html: Optional[str] = None):
+        if not self.cache_dir:
+            return
+        meta_path, html_path = self._paths(key)
+        if html is not None:
+            _atomic_write(html_path, html)
+        _atomic_write(meta_path, json.dumps(meta, ensure_ascii=False))
+        self._maybe_prune()
+
+    def _maybe_prune(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_prune < FETCH_CACHE_PRUNE_SECONDS:
+                return
+            self._last_prune = now
+        self.prune_cache(now)
+
+    def prune_cache(self, now: Optional[float] = None):
+        """Drop entries older than max_age_seconds, then the oldest beyond max_entries."""
+        now = now or time.time()
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+        # Revalidation rewrites the metadata file, so mtime tracks last use
+        entries.sort(reverse=True)
+        for i, (mtime, meta_path) in enumerate(entries):
+            if i >= self.max_entries or now - mtime > self.max_age_seconds:
+                for path in (meta_path, meta_path[: -len(".json")] + ".html"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def fetch(self, url: str) -> Tuple[str, str]:
+        url = url.strip()
+        key = canonical_url(url)
+        cached = self._read_cache(key)
+        now = time.time()
+
+        if cached and now - cached["fetched_at"] < self.fresh_seconds:
+            return cached["title"], cached["text"]
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        with self._slot(key):
+            response = self.transport.get(url, headers, self.timeout)
+
+        if response.status == 304 and cached:
+            cached["fetched_at"] = now
+            self._write_cache(key, cached)
+            return cached["title"], cached["text"]
+
+        if response.status != 200:
+            raise Exception(f"Failed to download article (HTTP {response.status})")
+
+        title, text = extract_article(url, response.body)
+        if not text.strip():
+            raise Exception("Failed to extract article text")
+
+        self._write_cache(
+            key,
+            {
+                "url": url,
+                "title": title,
+                "text": text,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "fetched_at": now,
+            },
+            response.body,
+        )
+        return title, text
+
+
+def _atomic_write(path: str, data: str):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+_fetcher: Optional[ArticleFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> ArticleFetcher:
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = ArticleFetcher()
+        return _fetcher
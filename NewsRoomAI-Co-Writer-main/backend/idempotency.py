@@ -0,0 +1,242 @@
+import os
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from database import engine
+from model import RequestClaim
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+# How long a retry waits for the original request before giving up with 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "120"))
+# A pending claim older than this belongs to a crashed process and may be taken over
+CLAIM_LEASE_SECONDS = int(os.getenv("CLAIM_LEASE_SECONDS", "300"))
+CLAIM_POLL_SECONDS = float(os.getenv("CLAIM_POLL_SECONDS", "0.25"))
+
+# "memory" coalesces within one process; "db" also across uvicorn workers
+COALESCE_BACKEND = os.getenv("COALESCE_BACKEND", "memory")
+# Finished results stay visible this long so slightly late duplicates still share them
+COALESCE_RESULT_TTL_SECONDS = int(os.getenv("COALESCE_RESULT_TTL_SECONDS", "10"))
+
+# Identifies this process as the owner of its claims
+OWNER = uuid.uuid4().hex
+
+
+class RequestMismatch(ValueError):
+    pass
+
+
+class RequestInProgress(RuntimeError):
+    pass
+
+
+def request_hash(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def claim_key(namespace: str, key: str) -> str:
+    # Client-supplied keys are hashed so their length and charset don't matter
+    return f"{namespace}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+# =========================
+# CLAIMS
+# =========================
+
+def _claim(key: str, digest: str) -> Optional[RequestClaim]:
+    """Returns None when this process now owns the key, else the existing claim."""
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        row = session.get(RequestClaim, key)
+        if row is not None and row.expires_at < now:
+            # Expired result or abandoned lease; whoever deletes it first may re-claim
+            session.execute(
+                delete(RequestClaim).where(
+                    RequestClaim.key == key, RequestClaim.expires_at < now
+                )
+            )
+            session.commit()
+            row = None
+
+        if row is None:
+            session.add(RequestClaim(
+                key=key,
+                request_hash=digest,
+                owner=OWNER,
+                expires_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS),
+            ))
+            try:
+                session.commit()
+                return None
+            except IntegrityError:
+                session.rollback()
+                row = session.get(RequestClaim, key)
+                if row is None:
+                    return _claim(key, digest)
+
+        if row.request_hash != digest:
+            raise RequestMismatch("Idempotency key was already used for a different request")
+        return row
+
+
+def _complete(key: str, status_code: int, response: Any, ttl_seconds: int):
+    with Session(engine) as session:
+        session.execute(
+            update(RequestClaim)
+            .where(RequestClaim.key == key, RequestClaim.owner == OWNER)
+            .values(
+                state="done",
+                status_code=status_code,
+                response=response,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds),
+            )
+        )
+        session.commit()
+
+
+def _release(key: str):
+    # Failed requests leave nothing behind so a retry runs again
+    with Session(engine) as session:
+        session.execute(
+            delete(RequestClaim).where(
+                RequestClaim.key == key,
+                RequestClaim.owner == OWNER,
+                RequestClaim.state == "pending",
+            )
+        )
+        session.commit()
+
+
+def _renew(key: str) -> bool:
+    with Session(engine) as session:
+        result = session.execute(
+            update(RequestClaim)
+            .where(
+                RequestClaim.key == key,
+                RequestClaim.owner == OWNER,
+                RequestClaim.state == "pending",
+            )
+            .values(expires_at=datetime.utcnow() + timedelta(seconds=CLAIM_LEASE_SECONDS))
+        )
+        session.commit()
+        return result.rowcount == 1
+
+
+async def _keep_lease(key: str):
+    while True:
+        await asyncio.sleep(CLAIM_LEASE_SECONDS / 3)
+        try:
+            if not await asyncio.to_thread(_renew, key):
+                logger.warning("Claim %s was taken over before it finished", key)
+                return
+        except Exception:
+            # A missed renewal is retried next beat; the lease covers two more
+            logger.exception("Renewing claim %s failed", key)
+
+
+@asynccontextmanager
+async def hold(key: str):
+    """Keep an owned claim's lease alive for as long as the block runs."""
+    lease = asyncio.create_task(_keep_lease(key))
+    try:
+        yield
+    finally:
+        lease.cancel()
+
+
+def _load(key: str) -> Optional[RequestClaim]:
+    with Session(engine) as session:
+        return session.get(RequestClaim, key)
+
+
+async def acquire(
+    key: str, digest: str, wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS
+) -> Optional[RequestClaim]:
+    """None when the caller now owns key, else the finished claim to replay.
+
+    Waits while another owner is working on it and takes over if that
+    owner's lease runs out.
+    """
+    deadline = asyncio.get_running_loop().time() + wait_seconds
+    while True:
+        row = await asyncio.to_thread(_claim, key, digest)
+        if row is None or row.state == "done":
+            return row
+        if asyncio.get_running_loop().time() >= deadline:
+            raise RequestInProgress("A request with this key is still in progress")
+        await asyncio.sleep(CLAIM_POLL_SECONDS)
+
+
+async def complete(key: str, status_code: int, response: Any, ttl_seconds: int):
+    await asyncio.to_thread(_complete, key, status_code, response, ttl_seconds)
+
+
+async def release(key: str):
+    await asyncio.to_thread(_release, key)
+
+
+async def run_once(
+    key: str,
+    digest: str,
+    compute: Callable[[], Awaitable[Tuple[int, Any]]],
+    ttl_seconds: int,
+    wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS,
+) -> Tuple[int, Any, bool]:
+    """Run compute once per key across processes; returns (status_code, response, replayed)."""
+    row = await acquire(key, digest, wait_seconds)
+    if row is not None:
+        return row.status_code, row.response, True
+
+    try:
+        async with hold(key):
+            status_code, response = await compute()
+    except BaseException:
+        await release(key)
+        raise
+
+    await complete(key, status_code, response, ttl_seconds)
+    return status_code, response, False
+
+
+# =========================
+# COALESCING
+# =========================
+
+class Coalescer:
+    """Single-flight for identical requests; spans processes with COALESCE_BACKEND=db."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.local = SingleFlight()
+
+    def pending(self, key: Hashable) -> Optional[asyncio.Task]:
+        # Only flights started by this process; enough to join a request in progress here
+        return self.local.pending(key)
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if COALESCE_BACKEND != "db":
+            return await self.local.run(key, fn)
+        return await self.local.run(key, lambda: self._run_db(key, fn))
+
+    async def _run_db(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        async def compute():
+            return 200, await fn()
+
+        digest = request_hash(key)
+        _, value, _ = await run_once(
+            f"{self.namespace}:{digest}", digest, compute, COALESCE_RESULT_TTL_SECONDS
+        )
+        return value
@@ -0,0 +1,503 @@
+"""Continuous ingest of local RSS/Atom feeds and JSONL dumps.
+
+    python ingest.py feeds/wire.xml dumps/links.jsonl --watch 300
+
+Items flow through bounded queues:
+
+    route (URL dedupe + checkpoint) -> fetch -> clean -> analyze -> save (batched)
+
+Each stage has its own worker count, and a full queue blocks the stage
+before it, so a slow LLM throttles fetching instead of piling up pages in
+memory. Every finished stage is recorded in IngestItem; a rerun of the same
+feed skips done items and resumes the rest from their last stage.
+"""
+from startup import timed, mark_ready
+
+import os
+import re
+import json
+import html
+import uuid
+import signal
+import asyncio
+import logging
+import argparse
+import unicodedata
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlmodel import Session, select
+
+from database import engine, create_db_and_tables
+from model import IngestItem
+from search import setup_search_index
+from analytics import setup_rollups
+from llm_client import close_async_client
+from ai import fetch_article_from_link
+from pipeline import (
+    source_key,
+    title_from_text,
+    analyze_resolved,
+    prescore_gate,
+    build_article,
+    add_articles,
+)
+from llm_scheduler import llm_priority, PRIORITY_BATCH
+from metrics import Counter, time_stage
+
+logger = logging.getLogger(__name__)
+
+INGEST_ROOT = os.getenv("INGEST_ROOT", os.path.join(os.path.dirname(__file__), "ingest"))
+INGEST_FETCH_CONCURRENCY = int(os.getenv("INGEST_FETCH_CONCURRENCY", "8"))
+INGEST_CLEAN_CONCURRENCY = int(os.getenv("INGEST_CLEAN_CONCURRENCY", "2"))
+INGEST_ANALYZE_CONCURRENCY = int(os.getenv("INGEST_ANALYZE_CONCURRENCY", "4"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "20"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "100"))
+# Failed items are retried on later runs until they reach this many attempts
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+ROUTE_BATCH = 200
+# Finished runs kept for GET /ingest/{run_id}
+INGEST_RUNS_KEPT = 50
+
+ingest_items = Counter(
+    "newsroom_ingest_items_total", "Feed ingest items by outcome.", ["outcome"]
+)
+
+
+@dataclass
+class IngestTask:
+    key: str
+    link: Optional[str] = None
+    title: Optional[str] = None
+    text: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    attempts: int = 0
+
+
+# =========================
+# FEED READERS
+# =========================
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_BREAK_RE = re.compile(r"<\s*(br|/p|/div|/h[1-6]|/li)\s*/?\s*>", re.IGNORECASE)
+
+
+def strip_html(markup: str) -> str:
+    return html.unescape(_TAG_RE.sub(" ", _BREAK_RE.sub("\n\n", markup)))
+
+
+def task_from_fields(link: Optional[str], title: Optional[str], text: Optional[str]) -> Optional[IngestTask]:
+    # Same precedence as /analyze: a link wins over inline text
+    title = (title or "").strip() or None
+    if link and link.strip():
+        return IngestTask(key=source_key(None, link.strip()), link=link.strip(), title=title)
+    if text and text.strip():
+        return IngestTask(key=source_key(text, None), title=title, text=text)
+    return None
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _entry_link(entry: ET.Element) -> Optional[str]:
+    for child in entry:
+        if _local(child.tag) != "link":
+            continue
+        # RSS puts the URL in the text, Atom in href (rel defaults to alternate)
+        if child.text and child.text.strip():
+            return child.text.strip()
+        if child.get("href") and child.get("rel", "alternate") == "alternate":
+            return child.get("href")
+    return None
+
+
+def read_xml_feed(path: str) -> Iterator[IngestTask]:
+    for _, element in ET.iterparse(path, events=("end",)):
+        if _local(element.tag) not in ("item", "entry"):
+            continue
+        fields = {_local(child.tag): child.text or "" for child in element}
+        body = fields.get("encoded") or fields.get("content") or fields.get("description") or fields.get("summary")
+        task = task_from_fields(_entry_link(element), fields.get("title"), strip_html(body) if body else None)
+        element.clear()
+        if task:
+            yield task
+
+
+def read_jsonl(path: str) -> Iterator[IngestTask]:
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("%s:%d: invalid JSON, skipped", path, number)
+                continue
+            task = task_from_fields(record.get("link") or record.get("url"), record.get("title"), record.get("text"))
+            if task:
+                yield task
+
+
+def read_feed(path: str) -> Iterator[IngestTask]:
+    if path.endswith((".jsonl", ".ndjson")):
+        return read_jsonl(path)
+    with open(path, encoding="utf-8") as f:
+        head = f.read(512).lstrip()
+    return read_jsonl(path) if head.startswith("{") else read_xml_feed(path)
+
+
+def clean_text(text: str) -> str:
+    # Keep paragraph breaks (rewrites and chunking rely on them), collapse the rest
+    text = unicodedata.normalize("NFC", text or "")
+    paragraphs = (" ".join(p.split()) for p in re.split(r"\n\s*\n", text))
+    return "\n\n".join(p for p in paragraphs if p)
+
+
+# =========================
+# CHECKPOINTS
+# =========================
+
+def load_checkpoints(keys: List[str]) -> Dict[str, IngestItem]:
+    with Session(engine) as session:
+        rows = session.exec(select(IngestItem).where(IngestItem.key.in_(keys))).all()
+        return {row.key: row for row in rows}
+
+
+def _checkpoint_row(session: Session, feed: str, task: IngestTask) -> IngestItem:
+    row = session.get(IngestItem, task.key) or IngestItem(key=task.key, feed=feed)
+    row.link = task.link
+    row.title = task.title
+    # Inline text is in the feed already; only fetched pages need keeping
+    row.text = task.text if task.link else None
+    row.result = task.result
+    row.attempts = task.attempts
+    row.updated_at = datetime.utcnow()
+    return row
+
+
+def checkpoint(feed: str, task: IngestTask, status: str, error: Optional[str] = None):
+    with Session(engine) as session:
+        row = _checkpoint_row(session, feed, task)
+        row.status = status
+        row.error = error
+        session.add(row)
+        session.commit()
+
+
+def save_batch(feed: str, tasks: List[IngestTask]) -> int:
+    """Insert the articles and mark their items done in one transaction."""
+    with time_stage("save"), Session(engine) as session:
+        articles = [build_article(t.title, t.text, t.result) for t in tasks]
+        add_articles(session, articles, [t.result.get("duplicate_of") for t in tasks])
+        for task, article in zip(tasks, articles):
+            row = _checkpoint_row(session, feed, task)
+            row.status = "done"
+            row.article_id = article.id
+            row.error = None
+            session.add(row)
+        session.commit()
+    return len(tasks)
+
+
+# =========================
+# PIPELINE
+# =========================
+
+def new_stats() -> Dict[str, int]:
+    return dict.fromkeys(
+        ["read", "duplicate", "already_done", "resumed", "fetched", "analyzed", "saved", "skipped", "failed"], 0
+    )
+
+
+def _count(stats: Dict[str, int], outcome: str, amount: int = 1):
+    stats[outcome] += amount
+    ingest_items.inc(amount, outcome=outcome)
+
+
+async def run_ingest(
+    path: str,
+    fetch_concurrency: int = INGEST_FETCH_CONCURRENCY,
+    clean_concurrency: int = INGEST_CLEAN_CONCURRENCY,
+    analyze_concurrency: int = INGEST_ANALYZE_CONCURRENCY,
+    batch_size: int = INGEST_BATCH_SIZE,
+    queue_size: int = INGEST_QUEUE_SIZE,
+    prescore_threshold: Optional[int] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> Dict[str, int]:
+    feed = os.path.abspath(path)
+    stats = stats if stats is not None else new_stats()
+    to_fetch, to_clean, to_analyze, to_save = (asyncio.Queue(queue_size) for _ in range(4))
+
+    async def fail(task: IngestTask, error: Exception):
+        task.attempts += 1
+        message = str(error) or type(error).__name__
+        logger.warning("Ingest of %s failed: %s", task.link or task.key, message)
+        await asyncio.to_thread(checkpoint, feed, task, "failed", message)
+        _count(stats, "failed")
+
+    async def route():
+        # Duplicates within the feed and items finished on an earlier run stop here
+        items = read_feed(feed)
+        seen = set()
+        while True:
+            batch = await asyncio.to_thread(lambda: list(islice(items, ROUTE_BATCH)))
+            if not batch:
+                return
+            _count(stats, "read", len(batch))
+            known = await asyncio.to_thread(load_checkpoints, list({t.key for t in batch}))
+
+            for task in batch:
+                if task.key in seen:
+                    _count(stats, "duplicate")
+                    continue
+                seen.add(task.key)
+
+                row = known.get(task.key)
+                if row is not None:
+                    if row.status in ("done", "skipped") or (
+                        row.status == "failed" and row.attempts >= INGEST_MAX_ATTEMPTS
+                    ):
+                        _count(stats, "already_done")
+                        continue
+                    # Later stages pass these through untouched
+                    task.attempts = row.attempts
+                    task.title = row.title or task.title
+                    task.text = row.text or task.text
+                    task.result = row.result
+                    _count(stats, "resumed")
+
+                await to_fetch.put(task)
+
+    async def fetch(task: IngestTask) -> bool:
+        if task.text is None:
+            with time_stage("fetch"):
+                title, text = await asyncio.to_thread(fetch_article_from_link, task.link)
+            task.title = task.title or title
+            task.text = text
+            await asyncio.to_thread(checkpoint, feed, task, "fetched")
+            _count(stats, "fetched")
+        return True
+
+    async def clean(task: IngestTask) -> bool:
+        if task.result is not None:
+            return True
+        task.text = await asyncio.to_thread(clean_text, task.text)
+        if not task.text:
+            raise ValueError("No article content found")
+        task.title = task.title or title_from_text(task.text)
+        if await prescore_gate(task.text, prescore_threshold) is not None:
+            await asyncio.to_thread(checkpoint, feed, task, "skipped")
+            _count(stats, "skipped")
+            return False
+        return True
+
+    async def analyze(task: IngestTask) -> bool:
+        if task.result is None:
+            _, task.result = await analyze_resolved(task.title, task.text)
+            await asyncio.to_thread(checkpoint, feed, task, "analyzed")
+            _count(stats, "analyzed")
+        return True
+
+    async def stage(inbox: asyncio.Queue, outbox: asyncio.Queue, handle, workers: int, downstream: int):
+        async def worker():
+            llm_priority.set(PRIORITY_BATCH)
+            while True:
+                task = await inbox.get()
+                if task is None:
+                    return
+                try:
+                    forward = await handle(task)
+                except Exception as e:
+                    await fail(task, e)
+                    continue
+                if forward:
+                    await outbox.put(task)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        for _ in range(downstream):
+            await outbox.put(None)
+
+    async def save():
+        # Whatever is queued when the saver wakes up goes in one transaction
+        while True:
+            task = await to_save.get()
+            if task is None:
+                return
+            batch = [task]
+            finished = False
+            while len(batch) < batch_size and not to_save.empty():
+                task = to_save.get_nowait()
+                if task is None:
+                    finished = True
+                    break
+                batch.append(task)
+
+            try:
+                _count(stats, "saved", await asyncio.to_thread(save_batch, feed, batch))
+            except Exception:
+                if len(batch) == 1:
+                    await fail(batch[0], RuntimeError("Saving the article failed"))
+                else:
+                    logger.exception("Ingest batch failed; saving items one by one")
+                    for task in batch:
+                        try:
+                            _count(stats, "saved", await asyncio.to_thread(save_batch, feed, [task]))
+                        except Exception as e:
+                            await fail(task, e)
+            if finished:
+                return
+
+    async def routed():
+        await route()
+        for _ in range(fetch_concurrency):
+            await to_fetch.put(None)
+
+    await asyncio.gather(
+        routed(),
+        stage(to_fetch, to_clean, fetch, fetch_concurrency, clean_concurrency),
+        stage(to_clean, to_analyze, clean, clean_concurrency, analyze_concurrency),
+        stage(to_analyze, to_save, analyze, analyze_concurrency, 1),
+        save(),
+    )
+    return stats
+
+
+# =========================
+# BACKGROUND RUNS
+# =========================
+
+_runs: Dict[str, Dict[str, Any]] = {}
+_run_tasks: Dict[str, asyncio.Task] = {}
+
+
+def resolve_feed_path(path: str) -> str:
+    """Feeds requested over HTTP must live under INGEST_ROOT."""
+    root = os.path.realpath(INGEST_ROOT)
+    full = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full]) != root:
+        raise ValueError("Feed path must be inside the ingest directory")
+    if not os.path.isfile(full):
+        raise FileNotFoundError(path)
+    return full
+
+
+def start_ingest(path: str, **options) -> Dict[str, Any]:
+    if any(run["feed"] == path and run["status"] == "running" for run in _runs.values()):
+        raise RuntimeError("This feed is already being ingested")
+
+    finished = [key for key, run in _runs.items() if run["status"] != "running"]
+    for key in finished[:max(0, len(finished) - INGEST_RUNS_KEPT)]:
+        del _runs[key]
+
+    run_id = uuid.uuid4().hex[:12]
+    run = {
+        "id": run_id,
+        "feed": path,
+        "status": "running",
+        "stats": new_stats(),
+        "error": None,
+        "started_at": datetime.utcnow(),
+        "finished_at": None,
+    }
+    _runs[run_id] = run
+
+    async def execute():
+        try:
+            await run_ingest(path, stats=run["stats"], **options)
+            run["status"] = "done"
+        except asyncio.CancelledError:
+            run["status"] = "cancelled"
+            raise
+        except Exception as e:
+            logger.exception("Ingest of %s failed", path)
+            run["status"] = "failed"
+            run["error"] = str(e) or type(e).__name__
+        finally:
+            run["finished_at"] = datetime.utcnow()
+            _run_tasks.pop(run_id, None)
+
+    _run_tasks[run_id] = asyncio.create_task(execute())
+    return run
+
+
+def get_ingest_run(run_id: str) -> Optional[Dict[str, Any]]:
+    return _runs.get(run_id)
+
+
+async def stop_ingest_runs():
+    # Checkpoints let the next run pick up where these stop
+    tasks = list(_run_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# =========================
+# CLI
+# =========================
+
+async def main(paths: List[str], watch: Optional[float], options: Dict[str, Any]):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    try:
+        while not stop.is_set():
+            for path in paths:
+                run = asyncio.create_task(run_ingest(path, **options))
+                stopped = asyncio.create_task(stop.wait())
+                await asyncio.wait([run, stopped], return_when=asyncio.FIRST_COMPLETED)
+                stopped.cancel()
+                if not run.done():
+                    run.cancel()
+                    await asyncio.gather(run, return_exceptions=True)
+                    return
+                print(json.dumps({"feed": path, **run.result()}))
+
+            if watch is None:
+                return
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=watch)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await close_async_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest RSS/Atom feeds or JSONL dumps of links and texts")
+    parser.add_argument("paths", nargs="+", help="feed files (.xml/.rss/.atom or .jsonl)")
+    parser.add_argument("--watch", type=float, help="re-read the feeds every N seconds until stopped")
+    parser.add_argument("--fetch-concurrency", type=int, default=INGEST_FETCH_CONCURRENCY)
+    parser.add_argument("--clean-concurrency", type=int, default=INGEST_CLEAN_CONCURRENCY)
+    parser.add_argument("--analyze-concurrency", type=int, default=INGEST_ANALYZE_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--queue-size", type=int, default=INGEST_QUEUE_SIZE)
+    parser.add_argument("--prescore-threshold", type=int, help="skip items whose pre-score is below this (0-100)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with timed("create_db_and_tables"):
+        create_db_and_tables()
+    with timed("setup_search_index"):
+        setup_search_index()
+    with timed("setup_rollups"):
+        setup_rollups()
+    mark_ready()
+    asyncio.run(main(args.paths, args.watch, {
+        "fetch_concurrency": args.fetch_concurrency,
+        "clean_concurrency": args.clean_concurrency,
+        "analyze_concurrency": args.analyze_concurrency,
+        "batch_size": args.batch_size,
+        "queue_size": args.queue_size,
+        "prescore_threshold": args.prescore_threshold,
+    }))
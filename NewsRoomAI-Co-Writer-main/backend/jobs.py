@@ -0,0 +1,219 @@
+import os
+import asyncio
+import logging
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from database import engine
+from model import AnalysisJob
+from pipeline import analyze_source, save_articles
+from llm_scheduler import llm_priority, PRIORITY_BATCH
+
+logger = logging.getLogger(__name__)
+
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+# A running job whose worker stops renewing it for this long is requeued
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Rows claimed before leases existed have no lease_until; fall back to their age
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+# =========================
+# QUEUE OPERATIONS
+# =========================
+
+def submit_job(text: str | None, link: str | None) -> AnalysisJob:
+    job = AnalysisJob(text=text or None, link=link or None)
+    with Session(engine) as session:
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+    return job
+
+
+def get_job(session: Session, job_id: int) -> Optional[AnalysisJob]:
+    return session.get(AnalysisJob, job_id)
+
+
+def claim_next_job(worker_id: str) -> Optional[AnalysisJob]:
+    # Guarded UPDATE instead of SELECT ... FOR UPDATE so it works the same
+    # on SQLite and Postgres; a lost race just moves on to the next job.
+    with Session(engine) as session:
+        while True:
+            job_id = session.exec(
+                select(AnalysisJob.id)
+                .where(AnalysisJob.status == "queued")
+                .order_by(AnalysisJob.created_at, AnalysisJob.id)
+                .limit(1)
+            ).first()
+            if job_id is None:
+                return None
+
+            result = session.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id, AnalysisJob.status == "queued")
+                .values(
+                    status="running",
+                    worker_id=worker_id,
+                    started_at=datetime.utcnow(),
+                    lease_until=datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS),
+                    attempts=AnalysisJob.attempts + 1,
+                )
+            )
+            session.commit()
+            if result.rowcount == 1:
+                return session.get(AnalysisJob, job_id)
+
+
+def renew_lease(job_id: int, worker_id: str) -> bool:
+    with Session(engine) as session:
+        result = session.execute(
+            update(AnalysisJob)
+            .where(
+                AnalysisJob.id == job_id,
+                AnalysisJob.worker_id == worker_id,
+                AnalysisJob.status == "running",
+            )
+            .values(lease_until=datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS))
+        )
+        session.commit()
+        return result.rowcount == 1
+
+
+def finish_job(job_id: int, worker_id: str, article_id: int | None = None, error: str | None = None):
+    # Guarded on the owner so a worker that lost its lease can't overwrite the new run
+    with Session(engine) as session:
+        session.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, AnalysisJob.worker_id == worker_id)
+            .values(
+                status="failed" if error else "done",
+                article_id=article_id,
+                error=error,
+                lease_until=None,
+                finished_at=datetime.utcnow(),
+            )
+        )
+        session.commit()
+
+
+def requeue_stale_jobs() -> int:
+    # Jobs left "running" by a worker that died are picked up again. Each
+    # UPDATE re-checks the lease, so a heartbeat that lands first wins.
+    now = datetime.utcnow()
+    expired = (
+        (AnalysisJob.status == "running")
+        & (
+            (AnalysisJob.lease_until < now)
+            | (
+                AnalysisJob.lease_until.is_(None)
+                & (AnalysisJob.started_at < now - timedelta(seconds=JOB_STALE_SECONDS))
+            )
+        )
+    )
+    with Session(engine) as session:
+        failed = session.execute(
+            update(AnalysisJob)
+            .where(expired, AnalysisJob.attempts >= JOB_MAX_ATTEMPTS)
+            .values(
+                status="failed",
+                error="Worker lost the job too many times",
+                lease_until=None,
+                finished_at=now,
+            )
+        )
+        requeued = session.execute(
+            update(AnalysisJob)
+            .where(expired)
+            .values(status="queued", worker_id=None, lease_until=None)
+        )
+        session.commit()
+        return failed.rowcount + requeued.rowcount
+
+
+def job_payload(job: AnalysisJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "article_id": job.article_id,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# =========================
+# WORKERS
+# =========================
+
+async def heartbeat(job_id: int, worker_id: str):
+    while True:
+        await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+        try:
+            if not await asyncio.to_thread(renew_lease, job_id, worker_id):
+                logger.warning("Job %s lease lost by %s", job_id, worker_id)
+                return
+        except Exception:
+            # A missed renewal is retried next beat; the lease covers two more
+            logger.exception("Renewing the lease of job %s failed", job_id)
+
+
+async def run_job(job: AnalysisJob, worker_id: str):
+    lease = asyncio.create_task(heartbeat(job.id, worker_id))
+    try:
+        article, ai_result = await analyze_source(job.text, job.link)
+        [article] = await asyncio.to_thread(
+            save_articles, [article], [ai_result.get("duplicate_of")]
+        )
+    except Exception as e:
+        logger.exception("Analysis job %s failed", job.id)
+        await asyncio.to_thread(finish_job, job.id, worker_id, None, str(e) or type(e).__name__)
+        return
+    finally:
+        lease.cancel()
+
+    await asyncio.to_thread(finish_job, job.id, worker_id, article.id, None)
+
+
+async def worker_loop(worker_id: str, stop: asyncio.Event):
+    llm_priority.set(PRIORITY_BATCH)
+    loop = asyncio.get_running_loop()
+    next_requeue = loop.time()
+    while not stop.is_set():
+        # Every worker sweeps now and then, so jobs orphaned by a crash are
+        # requeued once their lease runs out, not only at the next boot
+        if loop.time() >= next_requeue:
+            try:
+                requeued = await asyncio.to_thread(requeue_stale_jobs)
+                if requeued:
+                    logger.info("Requeued %s jobs with expired leases", requeued)
+            except Exception:
+                logger.exception("Requeueing stale jobs failed")
+            next_requeue = loop.time() + JOB_LEASE_SECONDS
+
+        job = await asyncio.to_thread(claim_next_job, worker_id)
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await run_job(job, worker_id)
+
+
+def new_worker_id(index: int) -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{index}-{uuid.uuid4().hex[:6]}"
+
+
+async def run_workers(count: int, stop: asyncio.Event):
+    await asyncio.gather(
+        *(worker_loop(new_worker_id(i), stop) for i in range(count))
+    )
@@ -0,0 +1,117 @@
+import json
+from typing import Any, List, Tuple
+
+Path = Tuple[Any, ...]
+
+_LITERAL_END = ",}] \t\r\n"
+
+
+class IncrementalJSONParser:
+    """Parse one JSON object as it arrives and report values as soon as they close.
+
+    ``feed`` returns ``(path, value)`` pairs for every completed value that
+    is not an object and is not inside an array, e.g. ``("bias_score",)`` or
+    ``("deep_analysis", "PASSIONIT", "Probing")``. Arrays are reported whole.
+    Text before the opening ``{`` (such as a markdown fence) is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self.value = None
+        self._pos = 0
+        self._started = False
+        self._stack: List[dict] = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._token_start = 0
+        self._literal_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        self.text += chunk
+        events: List[Tuple[Path, Any]] = []
+        while self._pos < len(self.text) and not self.done:
+            self._step(self.text[self._pos], events)
+            self._pos += 1
+        return events
+
+    def _path(self) -> Path:
+        return tuple(
+            frame["key"] if frame["type"] == "object" else frame["index"]
+            for frame in self._stack
+        )
+
+    def _complete(self, value: Any, events: List[Tuple[Path, Any]]):
+        path = self._path()
+        if isinstance(value, dict) or any(isinstance(p, int) for p in path):
+            return
+        events.append((path, value))
+
+    def _start_value(self):
+        frame = self._stack[-1]
+        if frame["type"] == "array":
+            frame["index"] += 1
+
+    def _step(self, ch: str, events: List[Tuple[Path, Any]]):
+        if not self._started:
+            if ch == "{":
+                self._started = True
+                self._stack.append({"type": "object", "start": self._pos, "key": None, "expect": "key"})
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                value = json.loads(self.text[self._token_start:self._pos + 1])
+                if self._string_is_key:
+                    self._stack[-1]["key"] = value
+                else:
+                    self._complete(value, events)
+            return
+
+        if self._literal_start is not None:
+            if ch not in _LITERAL_END:
+                return
+            self._complete(json.loads(self.text[self._literal_start:self._pos]), events)
+            self._literal_start = None
+
+        frame = self._stack[-1]
+
+        if ch in " \t\r\n":
+            return
+        if ch == '"':
+            self._string_is_key = frame["type"] == "object" and frame["expect"] == "key"
+            if not self._string_is_key:
+                self._start_value()
+            self._in_string = True
+            self._token_start = self._pos
+        elif ch == ":":
+            frame["expect"] = "value"
+        elif ch == ",":
+            if frame["type"] == "object":
+                frame["expect"] = "key"
+        elif ch in "{[":
+            self._start_value()
+            self._stack.append({
+                "type": "object" if ch == "{" else "array",
+                "start": self._pos,
+                "key": None,
+                "index": -1,
+                "expect": "key",
+            })
+        elif ch in "}]":
+            closed = self._stack.pop()
+            value = json.loads(self.text[closed["start"]:self._pos + 1])
+            if not self._stack:
+                self.done = True
+                self.value = value
+            else:
+                self._complete(value, events)
+        else:
+            self._start_value()
+            self._literal_start = self._pos
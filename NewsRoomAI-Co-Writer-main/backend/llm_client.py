@@ -0,0 +1,65 @@
+import os
+from typing import TYPE_CHECKING
+
+import httpx
+
+from settings import LLM_API_KEY, LLM_BASE_URL
+from startup import timed_lazy_import
+
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "500"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "100"))
+
+_client: "OpenAI | None" = None
+_async_client: "AsyncOpenAI | None" = None
+
+
+def load_openai():
+    # The SDK takes most of the import time of the app, so it loads on the first LLM call
+    with timed_lazy_import("openai"):
+        import openai
+    return openai
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+    )
+
+
+def get_client() -> "OpenAI":
+    global _client
+    if _client is None:
+        _client = load_openai().OpenAI(
+            api_key=LLM_API_KEY,
+            base_url=LLM_BASE_URL,
+            timeout=LLM_TIMEOUT_SECONDS,
+            max_retries=0,  # retries are owned by llm_scheduler
+            http_client=httpx.Client(limits=_limits(), timeout=LLM_TIMEOUT_SECONDS),
+        )
+    return _client
+
+
+def get_async_client() -> "AsyncOpenAI":
+    # One pooled client per process so concurrent requests share keep-alive connections
+    global _async_client
+    if _async_client is None:
+        _async_client = load_openai().AsyncOpenAI(
+            api_key=LLM_API_KEY,
+            base_url=LLM_BASE_URL,
+            timeout=LLM_TIMEOUT_SECONDS,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=LLM_TIMEOUT_SECONDS),
+        )
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
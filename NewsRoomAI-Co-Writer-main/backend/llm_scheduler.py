@@ -0,0 +1,390 @@
+import os
+import asyncio
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import Dict, Optional
+
+from chunking import estimate_tokens
+from llm_client import get_client, get_async_client, load_openai
+from metrics import (
+    COLLECTORS,
+    Gauge,
+    current_endpoint,
+    llm_latency,
+    llm_queue_wait,
+    llm_requests,
+    record_llm_usage,
+)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "30"))
+# Ask for a final usage chunk on streamed calls so their tokens are counted too
+LLM_STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "1") != "0"
+
+# Lower value is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+# Batch endpoints and workers set this; everything else is interactive
+llm_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "llm_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> tuple:
+    # Resolved on first use so importing the scheduler doesn't load the SDK
+    openai = load_openai()
+    return (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # Requests larger than the bucket wait for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        # Settle the estimate against real usage; may go negative
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "grant", "enqueued", "granted", "cancelled")
+
+    def __init__(self, priority: int, tokens: int, grant):
+        self.priority = priority
+        self.tokens = tokens
+        self.grant = grant
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+
+
+class LLMScheduler:
+    """Single dispatch point for LLM calls.
+
+    Requests queue by priority and are released by a dispatcher thread once a
+    concurrency slot is free and both the request and token buckets allow it.
+    Works from sync code and from any event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_retries: int = LLM_MAX_RETRIES,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._thread: Optional[threading.Thread] = None
+
+        self._waits = deque(maxlen=1000)
+        self._counters = {"dispatched": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+
+    # =========================
+    # DISPATCH
+    # =========================
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._dispatch_loop, name="llm-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+
+                if not self._heap or self._in_flight >= self.max_concurrency:
+                    self._cond.wait()
+                    continue
+
+                waiter = self._heap[0][2]
+                now = time.monotonic()
+                delay = max(
+                    self.request_bucket.wait_time(1, now),
+                    self.token_bucket.wait_time(waiter.tokens, now),
+                )
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+
+                heapq.heappop(self._heap)
+                self.request_bucket.take(1)
+                self.token_bucket.take(waiter.tokens)
+                self._in_flight += 1
+                self._counters["dispatched"] += 1
+                self._waits.append(now - waiter.enqueued)
+                llm_queue_wait.observe(now - waiter.enqueued, priority=waiter.priority)
+                waiter.granted = True
+                waiter.grant()
+
+    def _enqueue(self, waiter: _Waiter):
+        with self._cond:
+            self._ensure_thread()
+            heapq.heappush(self._heap, (waiter.priority, next(self._seq), waiter))
+            self._cond.notify_all()
+
+    def _cancel(self, waiter: _Waiter):
+        with self._cond:
+            if waiter.granted:
+                self._in_flight -= 1
+            else:
+                waiter.cancelled = True
+            self._cond.notify_all()
+
+    def release(self, estimated: int, actual: int | None = None):
+        with self._cond:
+            self._in_flight -= 1
+            if actual is not None:
+                self.token_bucket.adjust(actual - estimated)
+            self._cond.notify_all()
+
+    async def acquire_async(self, priority: int, tokens: int):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def grant():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = _Waiter(priority, tokens, grant)
+        self._enqueue(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._cancel(waiter)
+            raise
+
+    def acquire(self, priority: int, tokens: int):
+        event = threading.Event()
+        self._enqueue(_Waiter(priority, tokens, event.set))
+        event.wait()
+
+    # =========================
+    # CALLS
+    # =========================
+
+    @staticmethod
+    def estimate_request_tokens(kwargs: Dict) -> int:
+        prompt = sum(estimate_tokens(m.get("content") or "") for m in kwargs.get("messages", []))
+        return prompt + int(kwargs.get("max_tokens") or 1000)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        if isinstance(error, load_openai().RateLimitError):
+            self._counters["rate_limited"] += 1
+            retry_after = getattr(getattr(error, "response", None), "headers", {}).get("retry-after")
+            if retry_after:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    pass
+        self._counters["retries"] += 1
+        ceiling = min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * (2 ** attempt))
+        # Full jitter keeps retries from many workers from lining up
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    @contextmanager
+    def _metered(model: str, kind: str):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException as e:
+            outcome = "retryable_error" if isinstance(e, retryable_errors()) else "error"
+            raise
+        finally:
+            llm_latency.observe(time.perf_counter() - started, model=model, kind=kind)
+            llm_requests.inc(endpoint=current_endpoint.get(), model=model, outcome=outcome)
+
+    @staticmethod
+    def _usage(response) -> int | None:
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "total_tokens", None) if usage else None
+
+    async def chat_async(self, priority: int | None = None, **kwargs):
+        priority = llm_priority.get() if priority is None else priority
+        estimated = self.estimate_request_tokens(kwargs)
+
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(priority, estimated)
+            actual = None
+            try:
+                with self._metered(kwargs.get("model"), "chat"):
+                    response = await get_async_client().chat.completions.create(**kwargs)
+                actual = self._usage(response)
+                record_llm_usage(kwargs.get("model"), getattr(response, "usage", None))
+                return response
+            except retryable_errors() as e:
+                if attempt == self.max_retries:
+                    self._counters["failed"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                self.release(estimated, actual)
+            await asyncio.sleep(delay)
+
+    def chat(self, priority: int | None = None, **kwargs):
+        priority = llm_priority.get() if priority is None else priority
+        estimated = self.estimate_request_tokens(kwargs)
+
+        for attempt in range(self.max_retries + 1):
+            self.acquire(priority, estimated)
+            actual = None
+            try:
+                with self._metered(kwargs.get("model"), "chat"):
+                    response = get_client().chat.completions.create(**kwargs)
+                actual = self._usage(response)
+                record_llm_usage(kwargs.get("model"), getattr(response, "usage", None))
+                return response
+            except retryable_errors() as e:
+                if attempt == self.max_retries:
+                    self._counters["failed"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                self.release(estimated, actual)
+            time.sleep(delay)
+
+    @asynccontextmanager
+    async def stream_async(self, priority: int | None = None, **kwargs):
+        # The slot is held until the stream is closed
+        priority = llm_priority.get() if priority is None else priority
+        estimated = self.estimate_request_tokens(kwargs)
+        if LLM_STREAM_USAGE:
+            kwargs.setdefault("stream_options", {"include_usage": True})
+
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(priority, estimated)
+            try:
+                # Timed to the first response headers; the body is timed by the caller's endpoint
+                with self._metered(kwargs.get("model"), "stream"):
+                    stream = await get_async_client().chat.completions.create(stream=True, **kwargs)
+                break
+            except retryable_errors() as e:
+                self.release(estimated)
+                if attempt == self.max_retries:
+                    self._counters["failed"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+            except BaseException:
+                self.release(estimated)
+                raise
+            await asyncio.sleep(delay)
+
+        async def chunks():
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    record_llm_usage(kwargs.get("model"), chunk.usage)
+                yield chunk
+
+        try:
+            yield chunks()
+        finally:
+            await stream.close()
+            self.release(estimated)
+
+    # =========================
+    # METRICS
+    # =========================
+
+    def stats(self) -> Dict:
+        with self._cond:
+            queued = [w for _, _, w in self._heap if not w.cancelled]
+            waits = sorted(self._waits)
+            by_priority: Dict[int, int] = {}
+            for w in queued:
+                by_priority[w.priority] = by_priority.get(w.priority, 0) + 1
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+            request_tokens = self.request_bucket.tokens
+            llm_tokens = self.token_bucket.tokens
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 4)
+
+        return {
+            "queue_depth": len(queued),
+            "queue_depth_by_priority": by_priority,
+            "in_flight": in_flight,
+            "max_concurrency": self.max_concurrency,
+            "request_bucket_available": round(request_tokens, 1),
+            "token_bucket_available": round(llm_tokens, 1),
+            "wait_seconds": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(waits[-1], 4) if waits else 0.0,
+                "samples": len(waits),
+            },
+            **counters,
+        }
+
+    def gauges(self) -> Dict[str, int]:
+        # Cheap snapshot for /metrics; stats() sorts the wait samples
+        with self._cond:
+            return {
+                "queued": sum(1 for _, _, w in self._heap if not w.cancelled),
+                "in_flight": self._in_flight,
+            }
+
+
+scheduler = LLMScheduler()
+
+llm_queue_depth = Gauge("newsroom_llm_queue_depth", "LLM calls waiting in the scheduler.")
+llm_in_flight = Gauge("newsroom_llm_in_flight", "LLM calls currently running.")
+
+
+def _collect_scheduler():
+    gauges = scheduler.gauges()
+    llm_queue_depth.set(gauges["queued"])
+    llm_in_flight.set(gauges["in_flight"])
+
+
+COLLECTORS.append(_collect_scheduler)
@@ -1,30 +1,148 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+# Imported first so the startup report covers every import below
+from startup import timed, mark_ready, startup_report
+from metrics import MetricsMiddleware, render_metrics, time_stage
+
+import os
+import json
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import AsyncIterator, List
+from fastapi import FastAPI, HTTPException, Request, Response, Query, Header, Depends
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
+from datetime import date, datetime
 from sqlmodel import Session, select
-from database import engine, create_db_and_tables
+from sqlalchemy.orm import undefer, undefer_group
+from database import engine, create_db_and_tables, get_db
 from model import Article
-from ai import analyze_text, fetch_article_from_link
-from rewrite_ai import rewrite_article_neutral   
-from dotenv import load_dotenv
-from fastapi.responses import StreamingResponse
-from io import BytesIO
-from reportlab.pdfgen import canvas
+from pipeline import (
+    analyze_resolved,
+    resolve_source,
+    prescore_gate,
+    find_reusable_analysis,
+    build_article,
+    save_articles,
+    article_payload,
+    source_key,
+)
+from rewrite_ai import rewrite_article_neutral_async, stream_rewrite_article_neutral
+from sse import format_sse, SSE_HEADERS
+from pagination import parse_fields, after_cursor, encode_cursor
+from search import setup_search_index, index_article, remove_article, search_articles
+from dedupe import fingerprint_article, remove_fingerprint
+from analytics import (
+    setup_rollups,
+    rollup_key,
+    move_in_rollups,
+    remove_from_rollups,
+    bias_histogram,
+    bias_label_counts,
+    bias_trend,
+)
+from ai import analyze_deep_async, stream_full_analysis_async, cached_full_analysis
+from llm_scheduler import scheduler, llm_priority, PRIORITY_BATCH
+from prescore import PRESCORE_THRESHOLD
+from singleflight import SingleFlight
+from idempotency import (
+    Coalescer,
+    RequestInProgress,
+    RequestMismatch,
+    acquire,
+    complete,
+    hold,
+    release,
+    run_once,
+    claim_key,
+    request_hash,
+    IDEMPOTENCY_TTL_SECONDS,
+)
+from rewrite_tracking import (
+    incremental_rewrite,
+    record_rewrite,
+    seed_rewrite_state,
+    prune_rewrite_state,
+    rewrite_history,
+    remove_rewrite_tracking,
+)
+from llm_client import close_async_client, load_openai
+from jobs import submit_job, get_job, job_payload, run_workers
+from ingest import (
+    resolve_feed_path,
+    start_ingest,
+    get_ingest_run,
+    stop_ingest_runs,
+    INGEST_FETCH_CONCURRENCY,
+    INGEST_ANALYZE_CONCURRENCY,
+    INGEST_BATCH_SIZE,
+)
+from cache import result_cache
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from auth_routes import router as auth_router
-from database import create_db_and_tables
+from auth_utils import shutdown_hash_pool
+from pdf_export import (
+    open_cached_pdf,
+    discard,
+    ensure_pdf,
+    iter_file,
+    download_filename,
+    get_pool,
+    shutdown_pool,
+    build_zip,
+    remove_cached_pdfs,
+    PDF_EXPORT_MAX_ITEMS,
+)
 
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+# Link fetches are I/O bound and limited separately from LLM calls
+BATCH_FETCH_CONCURRENCY = int(os.getenv("BATCH_FETCH_CONCURRENCY", "16"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+# Workers inside the API process; set to 0 when running worker.py separately
+JOB_INPROCESS_WORKERS = int(os.getenv("JOB_INPROCESS_WORKERS", "2"))
+ARTICLES_PAGE_SIZE = int(os.getenv("ARTICLES_PAGE_SIZE", "100"))
+ARTICLES_MAX_PAGE_SIZE = int(os.getenv("ARTICLES_MAX_PAGE_SIZE", "500"))
+# Load the LLM SDK in the background once the app is ready instead of on the first request
+PRELOAD_AFTER_STARTUP = os.getenv("PRELOAD_AFTER_STARTUP", "1") != "0"
 
 app = FastAPI()
 app.include_router(auth_router)
 
 
 
+job_workers_stop = asyncio.Event()
+
 @app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
+async def on_startup():
+    with timed("create_db_and_tables"):
+        create_db_and_tables()
+    with timed("setup_search_index"):
+        setup_search_index()
+    with timed("setup_rollups"):
+        setup_rollups()
+    if JOB_INPROCESS_WORKERS > 0:
+        app.state.job_workers = asyncio.create_task(
+            run_workers(JOB_INPROCESS_WORKERS, job_workers_stop)
+        )
+    mark_ready()
+    if PRELOAD_AFTER_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, load_openai)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    job_workers_stop.set()
+    await stop_ingest_runs()
+    if getattr(app.state, "job_workers", None):
+        await app.state.job_workers
+    await close_async_client()
+    shutdown_pool()
+    shutdown_hash_pool()
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,7 +156,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 # =========================
@@ -51,192 +171,713 @@ class ArticleRequest(BaseModel):
 class AnalyzeRequest(BaseModel):
     text: str | None = ""
     link: str | None = ""
+    run_async: bool = Field(default=False, alias="async")
+    # Skip the LLM when the lexicon pre-score is below this (0-100)
+    prescore_threshold: int | None = Field(default=None, ge=0, le=100)
+
+class BatchAnalyzeRequest(BaseModel):
+    items: List[AnalyzeRequest]
+    concurrency: int | None = None
+    fetch_concurrency: int | None = None
+    prescore_threshold: int | None = Field(default=None, ge=0, le=100)
 
 class RewriteRequest(BaseModel): 
     article_id: int           
     text: str
 
+class ExportRequest(BaseModel):
+    ids: List[int]
+
+class IngestRequest(BaseModel):
+    # Relative to INGEST_ROOT
+    path: str
+    fetch_concurrency: int = Field(default=INGEST_FETCH_CONCURRENCY, ge=1, le=64)
+    analyze_concurrency: int = Field(default=INGEST_ANALYZE_CONCURRENCY, ge=1, le=64)
+    batch_size: int = Field(default=INGEST_BATCH_SIZE, ge=1, le=500)
+    prescore_threshold: int | None = Field(default=None, ge=0, le=100)
+
+# =========================
+# IDEMPOTENCY
+# =========================
+
+async def idempotent(namespace: str, key: str | None, data: BaseModel, handler):
+    # Replays of a finished request get the stored response instead of re-running it
+    if not key:
+        return await handler()
+
+    async def compute():
+        result = await handler()
+        if isinstance(result, JSONResponse):
+            return result.status_code, json.loads(result.body)
+        return 200, jsonable_encoder(result)
+
+    try:
+        status_code, content, replayed = await run_once(
+            claim_key(namespace, key),
+            request_hash(data.model_dump(by_alias=True)),
+            compute,
+            IDEMPOTENCY_TTL_SECONDS,
+        )
+    except RequestMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RequestInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(status_code=status_code, content=content, headers=headers)
+
 # =========================
 # ANALYZE ARTICLE
 # =========================
 
+# Concurrent submissions of the same link or text share one analysis and one row
+analyze_flights = Coalescer("analyze")
+
 @app.post("/analyze")
-def analyze_article(data: AnalyzeRequest):
-    # Prefer link if present
-    if data.link:
-        title, text = fetch_article_from_link(data.link)
-    else:
-        text = data.text
-        title = " ".join(text.strip().split("\n")[0].split()[:8])
-
-    if not text or not text.strip():
-        raise HTTPException(status_code=400, detail="No article content found")
-
-    ai_result = analyze_text(text)
-
-    article = Article(
-        title=title,
-        content=text,
-        bias_score=ai_result["bias_score"],
-        summary=ai_result["summary"],
-        perspectives=ai_result["perspectives"],
-        explanation=ai_result["explanation"],
-        deep_analysis=ai_result.get("deep_analysis"),
-        author_id=1
+async def analyze_article(
+    data: AnalyzeRequest,
+    idempotency_key: str | None = Header(default=None),
+):
+    return await idempotent("analyze", idempotency_key, data, lambda: run_analyze(data))
+
+async def run_analyze(data: AnalyzeRequest):
+    if data.run_async:
+        if not (data.link or (data.text and data.text.strip())):
+            raise HTTPException(status_code=400, detail="No article content found")
+
+        job = await run_in_threadpool(submit_job, data.text, data.link)
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job.id, "status": job.status},
+        )
+
+    threshold = (
+        data.prescore_threshold if data.prescore_threshold is not None else PRESCORE_THRESHOLD
+    )
+    return await analyze_flights.run(
+        (source_key(data.text, data.link), threshold),
+        lambda: analyze_and_save(data, threshold),
     )
 
-    with Session(engine) as session:
-        session.add(article)
-        session.commit()
-        session.refresh(article)
+async def analyze_and_save(data: AnalyzeRequest, threshold: int | None) -> dict:
+    try:
+        title, text = await resolve_source(data.text, data.link)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    skipped = await prescore_gate(text, threshold)
+    if skipped:
+        return {"title": title, **skipped}
+
+    article, ai_result = await analyze_resolved(title, text)
+
+    [article] = await run_in_threadpool(
+        save_articles, [article], [ai_result.get("duplicate_of")]
+    )
+
+    return article_payload(article, ai_result)
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def single_event(event: str, data) -> AsyncIterator[str]:
+    yield format_sse(event, data)
+
+@app.post("/analyze/stream")
+async def analyze_article_stream(
+    data: AnalyzeRequest,
+    request: Request,
+    idempotency_key: str | None = Header(default=None),
+):
+    # Shares keys with /analyze: the stored response is the same payload as "done"
+    claim = claim_key("analyze", idempotency_key) if idempotency_key else None
+    if claim:
+        try:
+            row = await acquire(claim, request_hash(data.model_dump(by_alias=True)))
+        except RequestMismatch as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except RequestInProgress as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if row is not None:
+            event = "done" if row.status_code < 400 else "error"
+            return sse_response(single_event(event, row.response))
+
+    try:
+        title, text = await resolve_source(data.text, data.link)
+    except ValueError as e:
+        if claim:
+            await release(claim)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    threshold = (
+        data.prescore_threshold if data.prescore_threshold is not None else PRESCORE_THRESHOLD
+    )
+
+    async def analyze_events():
+        skipped = await prescore_gate(text, threshold)
+        if skipped:
+            yield "done", {"title": title, **skipped}
+            return
+
+        # An identical /analyze already running here: wait for its row instead of paying twice
+        flight = analyze_flights.pending((source_key(data.text, data.link), threshold))
+        if flight is not None:
+            yield "done", jsonable_encoder(await asyncio.shield(flight))
+            return
+
+        ai_result = await find_reusable_analysis(text) or await cached_full_analysis(text)
+        if ai_result is None:
+            async for kind, payload in stream_full_analysis_async(text):
+                if await request.is_disconnected():
+                    return
+                if kind == "result":
+                    ai_result = payload
+                else:
+                    path, value = payload
+                    yield "field", {"path": list(path), "value": value}
+
+        article = build_article(title, text, ai_result)
+        [article] = await run_in_threadpool(
+            save_articles, [article], [ai_result.get("duplicate_of")]
+        )
+        yield "done", jsonable_encoder(article_payload(article, ai_result))
+
+    async def event_stream():
+        finished = False
+        try:
+            async with hold(claim) if claim else nullcontext():
+                async for event, payload in analyze_events():
+                    if event == "done":
+                        finished = True
+                        if claim:
+                            await complete(claim, 200, payload, IDEMPOTENCY_TTL_SECONDS)
+                    yield format_sse(event, payload)
+        except Exception as e:
+            logger.exception("Streaming analysis failed")
+            # The client sees a terminal event instead of a stream that just stops
+            yield format_sse("error", {"detail": str(e) or type(e).__name__})
+        finally:
+            if claim and not finished:
+                await release(claim)
+
+    return sse_response(event_stream())
+
+# =========================
+#  BATCH ANALYZE
+# =========================
+
+@app.post("/analyze/batch")
+async def analyze_batch(data: BatchAnalyzeRequest):
+    if not data.items:
+        raise HTTPException(status_code=400, detail="No articles provided")
+    if len(data.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch is limited to {BATCH_MAX_ITEMS} articles"
+        )
+
+    # Batch work queues behind interactive requests at the LLM scheduler
+    llm_priority.set(PRIORITY_BATCH)
+    concurrency = min(data.concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    fetch_concurrency = min(data.fetch_concurrency or BATCH_FETCH_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    llm_slots = asyncio.Semaphore(max(concurrency, 1))
+    fetch_slots = asyncio.Semaphore(max(fetch_concurrency, 1))
+    threshold = (
+        data.prescore_threshold if data.prescore_threshold is not None else PRESCORE_THRESHOLD
+    )
+
+    # Each item moves on to the LLM as soon as its own fetch is done, so a
+    # slow link only delays itself
+    async def process_item(item: AnalyzeRequest):
+        async with fetch_slots:
+            title, text = await resolve_source(item.text, item.link)
+
+        skipped = await prescore_gate(text, threshold)
+        if skipped is not None:
+            return skipped
+
+        async with llm_slots:
+            return await analyze_resolved(title, text)
+
+    outcomes = await asyncio.gather(
+        *(process_item(item) for item in data.items),
+        return_exceptions=True,
+    )
+
+    succeeded = [o for o in outcomes if isinstance(o, tuple)]
+    articles = [article for article, _ in succeeded]
+    # One transaction for the whole batch instead of a commit per article
+    await run_in_threadpool(
+        save_articles,
+        articles,
+        [ai_result.get("duplicate_of") for _, ai_result in succeeded],
+    )
+
+    results = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            results.append({
+                "index": index,
+                "status": "error",
+                "error": str(outcome) or type(outcome).__name__,
+            })
+        elif isinstance(outcome, dict):
+            results.append({"index": index, "status": "skipped", **outcome})
+        else:
+            article, ai_result = outcome
+            results.append({
+                "index": index,
+                "status": "ok",
+                **article_payload(article, ai_result),
+            })
 
     return {
-        "id": article.id,
-        "title": article.title,
-        "content": article.content,
-        "bias_score": article.bias_score,
-        "bias_label": ai_result.get("bias_label", "Unknown"),
-        "summary": article.summary,
-        "perspectives": article.perspectives,
-        "explanation": article.explanation,
-        "deep_analysis": article.deep_analysis,
+        "succeeded": len(articles),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
     }
 
+# =========================
+#  ANALYSIS JOBS
+# =========================
+
+@app.get("/jobs/{job_id}")
+def get_job_status(job_id: int, session: Session = Depends(get_db)):
+    job = get_job(session, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_payload(job)
+
+# =========================
+#  FEED INGEST
+# =========================
+
+@app.post("/ingest", status_code=202)
+async def ingest_feed(data: IngestRequest):
+    try:
+        path = resolve_feed_path(data.path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Feed not found")
+
+    try:
+        return start_ingest(
+            path,
+            fetch_concurrency=data.fetch_concurrency,
+            analyze_concurrency=data.analyze_concurrency,
+            batch_size=data.batch_size,
+            prescore_threshold=data.prescore_threshold,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/ingest/{run_id}")
+def get_ingest_status(run_id: str):
+    run = get_ingest_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Ingest run not found")
+    return run
+
 # =========================
 #  REWRITE ARTICLE (NEW)
 # =========================
+def save_rewrite(article_id: int, source_text: str, rewritten_text: str) -> bool:
+    with Session(engine) as session:
+        article = session.get(Article, article_id)
+        if not article:
+            return False
+
+        record_rewrite(session, article, rewritten_text)
+        seed_rewrite_state(session, article_id, source_text, rewritten_text)
+        session.commit()
+    return True
+
+rewrite_flights = Coalescer("rewrite")
+
 @app.post("/rewrite")
-def rewrite_article(data: RewriteRequest):
+async def rewrite_article(
+    data: RewriteRequest,
+    idempotency_key: str | None = Header(default=None),
+):
+    return await idempotent("rewrite", idempotency_key, data, lambda: run_rewrite(data))
+
+async def run_rewrite(data: RewriteRequest):
     if not data.text.strip():
         raise HTTPException(status_code=400, detail="No article text provided")
 
-    rewritten_text = rewrite_article_neutral(data.text)
+    return await rewrite_flights.run(
+        (data.article_id, source_key(data.text, None)),
+        lambda: rewrite_and_save(data),
+    )
 
-    with Session(engine) as session:
-        article = session.get(Article, data.article_id)
-        if not article:
-            raise HTTPException(status_code=404, detail="Article not found")
+async def rewrite_and_save(data: RewriteRequest) -> dict:
+    with time_stage("rewrite"):
+        rewritten_text = await rewrite_article_neutral_async(data.text)
 
-        article.rewritten_text = rewritten_text
-        article.updated_at = datetime.utcnow()
-        session.add(article)
-        session.commit()
+    if not await run_in_threadpool(save_rewrite, data.article_id, data.text, rewritten_text):
+        raise HTTPException(status_code=404, detail="Article not found")
 
     return {"rewritten_text": rewritten_text}
 
+@app.post("/articles/{article_id}/rewrite")
+async def rewrite_article_incremental(article_id: int):
+    # Re-rewrite the stored content, sending only changed paragraphs to the LLM
+    try:
+        return await incremental_rewrite(article_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/articles/{article_id}/rewrite_history")
+def get_rewrite_history(article_id: int, session: Session = Depends(get_db)):
+    return rewrite_history(session, article_id)
+
+def article_exists(article_id: int) -> bool:
+    with Session(engine) as session:
+        return session.get(Article, article_id) is not None
+
+@app.post("/rewrite/stream")
+async def rewrite_article_stream(data: RewriteRequest, request: Request):
+    if not data.text.strip():
+        raise HTTPException(status_code=400, detail="No article text provided")
+
+    if not await run_in_threadpool(article_exists, data.article_id):
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    async def event_stream():
+        parts = []
+        try:
+            async for token in stream_rewrite_article_neutral(data.text):
+                if await request.is_disconnected():
+                    return
+                parts.append(token)
+                yield format_sse("token", {"text": token})
+
+            rewritten_text = "".join(parts).strip()
+            if not await run_in_threadpool(save_rewrite, data.article_id, data.text, rewritten_text):
+                raise LookupError("Article not found")
+        except Exception as e:
+            logger.exception("Streaming rewrite failed")
+            # Same terminal event as /analyze/stream, so a cut-off body is never mistaken for the result
+            yield format_sse("error", {"detail": str(e) or type(e).__name__})
+            return
+
+        yield format_sse("done", {"rewritten_text": rewritten_text})
+
+    return sse_response(event_stream())
+
 # =========================
 # ARTICLES CRUD
 # =========================
 
 @app.get("/articles")
-def get_articles():
-    with Session(engine) as session:
-        return session.exec(
-            select(Article).order_by(Article.created_at.desc())
-        ).all()
+def get_articles(
+    response: Response,
+    limit: int = Query(default=ARTICLES_PAGE_SIZE, ge=1, le=ARTICLES_MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    fields: str | None = None,
+    min_bias: int | None = Query(default=None, ge=0, le=100),
+    max_bias: int | None = Query(default=None, ge=0, le=100),
+    author_id: int | None = None,
+    session: Session = Depends(get_db),
+):
+    try:
+        columns = parse_fields(fields)
+        conditions = [after_cursor(cursor)] if cursor else []
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if min_bias is not None:
+        conditions.append(Article.bias_score >= min_bias)
+    if max_bias is not None:
+        conditions.append(Article.bias_score <= max_bias)
+    if author_id is not None:
+        conditions.append(Article.author_id == author_id)
+
+    if columns:
+        statement = select(*[getattr(Article, name) for name in columns])
+    else:
+        statement = select(Article).options(undefer_group("body"))
+
+    statement = (
+        statement.where(*conditions)
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .limit(limit + 1)
+    )
+
+    if columns:
+        rows = [dict(row._mapping) for row in session.exec(statement).all()]
+    else:
+        rows = session.exec(statement).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        last = last if isinstance(last, dict) else {"id": last.id, "created_at": last.created_at}
+        response.headers["X-Next-Cursor"] = encode_cursor(last["created_at"], last["id"])
+
+    return rows
+
+@app.get("/articles/search")
+def search(
+    q: str = Query(min_length=1),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    session: Session = Depends(get_db),
+):
+    try:
+        results = search_articles(session, q, limit, offset)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    return {"query": q, "limit": limit, "offset": offset, "results": results}
 
 @app.get("/articles/{article_id}")
-def get_article(article_id: int):
+def get_article(article_id: int, session: Session = Depends(get_db)):
+    article = session.get(Article, article_id, options=[undefer_group("body")])
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return article
+
+deep_analysis_flights = SingleFlight()
+
+def load_article(article_id: int) -> Article | None:
     with Session(engine) as session:
-        article = session.get(Article, article_id)
-        if not article:
-            raise HTTPException(status_code=404, detail="Article not found")
-        return article
+        return session.get(
+            Article, article_id, options=[undefer(Article.content), undefer(Article.deep_analysis)]
+        )
 
-@app.put("/articles/{article_id}")
-def update_article(article_id: int, data: ArticleRequest):
+def save_deep_analysis(article_id: int, deep_analysis: dict):
     with Session(engine) as session:
         article = session.get(Article, article_id)
-        if not article:
-            raise HTTPException(status_code=404, detail="Article not found")
+        if article:
+            article.deep_analysis = deep_analysis
+            session.add(article)
+            session.commit()
+
+async def generate_deep_analysis(article_id: int, content: str) -> dict:
+    with time_stage("deep_analysis"):
+        deep_analysis = await analyze_deep_async(content)
+    await run_in_threadpool(save_deep_analysis, article_id, deep_analysis)
+    return deep_analysis
+
+@app.get("/articles/{article_id}/deep_analysis")
+async def get_deep_analysis(article_id: int):
+    article = await run_in_threadpool(load_article, article_id)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    if article.deep_analysis:
+        return {"article_id": article_id, "deep_analysis": article.deep_analysis}
+
+    # Concurrent first views share one LLM call
+    deep_analysis = await deep_analysis_flights.run(
+        article_id,
+        lambda: generate_deep_analysis(article_id, article.content),
+    )
+    return {"article_id": article_id, "deep_analysis": deep_analysis}
 
-        article.content = data.text
-        article.updated_at = datetime.utcnow()
+@app.put("/articles/{article_id}")
+def update_article(article_id: int, data: ArticleRequest, session: Session = Depends(get_db)):
+    article = session.get(Article, article_id)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    before = rollup_key(article)
+    article.content = data.text
+    article.updated_at = datetime.utcnow()
+
+    session.add(article)
+    index_article(session, article)
+    fingerprint_article(session, article)
+    move_in_rollups(session, before, article)
+    prune_rewrite_state(session, article)
+    session.commit()
+
+    return session.get(
+        Article, article_id, options=[undefer_group("body")], populate_existing=True
+    )
 
-        session.add(article)
-        session.commit()
-        session.refresh(article)
+@app.delete("/articles/{article_id}")
+def delete_article(article_id: int, session: Session = Depends(get_db)):
+    article = session.get(Article, article_id)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    remove_from_rollups(session, article)
+    session.delete(article)
+    remove_article(session, article_id)
+    remove_fingerprint(session, article_id)
+    remove_rewrite_tracking(session, article_id)
+    session.commit()
+    remove_cached_pdfs(article_id)
+
+    return {"status": "deleted"}
+# =========================
+#  ANALYTICS
+# =========================
 
-        return article
+@app.get("/analytics/bias_histogram")
+def get_bias_histogram(
+    start: date | None = None,
+    end: date | None = None,
+    author_id: int | None = None,
+    bucket_size: int = Query(default=10, ge=1, le=101),
+    session: Session = Depends(get_db),
+):
+    try:
+        return bias_histogram(session, start, end, author_id, bucket_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/bias_labels")
+def get_bias_labels(
+    start: date | None = None,
+    end: date | None = None,
+    author_id: int | None = None,
+    session: Session = Depends(get_db),
+):
+    try:
+        return bias_label_counts(session, start, end, author_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/bias_trend")
+def get_bias_trend(
+    start: date | None = None,
+    end: date | None = None,
+    author_id: int | None = None,
+    interval: str = Query(default="day", pattern="^(day|week)$"),
+    session: Session = Depends(get_db),
+):
+    try:
+        return bias_trend(session, start, end, author_id, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.delete("/articles/{article_id}")
-def delete_article(article_id: int):
-    with Session(engine) as session:
-        article = session.get(Article, article_id)
-        if not article:
-            raise HTTPException(status_code=404, detail="Article not found")
+# =========================
+#  RESULT CACHE / LLM SCHEDULER / STARTUP STATS
+# =========================
 
-        session.delete(article)
-        session.commit()
+@app.get("/cache/stats")
+def cache_stats():
+    return result_cache.stats()
+
+@app.get("/llm/stats")
+def llm_stats():
+    return scheduler.stats()
+
+@app.get("/startup/report")
+def get_startup_report():
+    return startup_report()
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
-        return {"status": "deleted"}
 # =========================
-#  DOWNLOAD ARTICLE AS PDF
+#  DOWNLOAD / EXPORT ARTICLES AS PDF
 # =========================
 
 
+def pdf_fields(article: Article, content: str, rewritten_text: str | None) -> dict:
+    return {
+        "id": article.id,
+        "title": article.title,
+        "bias_score": article.bias_score,
+        "summary": article.summary,
+        "content": content,
+        "rewritten_text": rewritten_text,
+    }
+
+def load_pdf_sources(session: Session, ids: List[int]) -> List[dict]:
+    # Article bodies are only loaded for PDFs that aren't cached yet
+    articles = session.exec(select(Article).where(Article.id.in_(ids))).all()
+    sources = []
+    for article in articles:
+        stamp = article.updated_at or article.created_at
+        source = {"id": article.id, "title": article.title, "stamp": stamp}
+        source["file"] = open_cached_pdf(article.id, stamp)
+        if source["file"] is None:
+            content, rewritten_text = session.exec(
+                select(Article.content, Article.rewritten_text).where(Article.id == article.id)
+            ).one()
+            source["fields"] = pdf_fields(article, content, rewritten_text)
+        sources.append(source)
+    return sources
+
+def open_rendered(path: str):
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        # Only a render of a newer version removes it, so this one is already stale
+        raise HTTPException(status_code=409, detail="Article changed while exporting; try again")
+
+def close_sources(sources: List[dict]):
+    for source in sources:
+        if source["file"] is not None:
+            source["file"].close()
+
 @app.get("/articles/{article_id}/download_pdf")
-def download_article_pdf(article_id: int):
-    with Session(engine) as session:
-        article = session.get(Article, article_id)
-        if not article:
-            raise HTTPException(status_code=404, detail="Article not found")
-
-    # Create PDF in memory
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer)
-
-    # Title
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(50, 800, article.title)
-
-    # Bias Score
-    pdf.setFont("Helvetica", 12)
-    pdf.drawString(50, 780, f"Bias Score: {article.bias_score}")
-
-    # Summary
-    y = 760
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(50, y, "Summary:")
-    pdf.setFont("Helvetica", 12)
-    y -= 20
-    for line in article.summary.split("\n"):
-        pdf.drawString(50, y, line)
-        y -= 15
-        if y < 50:
-            pdf.showPage()
-            y = 800
-
-    # Content
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(50, y, "Content:")
-    pdf.setFont("Helvetica", 12)
-    y -= 20
-    for line in article.content.split("\n"):
-        pdf.drawString(50, y, line)
-        y -= 15
-        if y < 50:
-            pdf.showPage()
-            y = 800
-
-    # Rewritten text if available
-    if getattr(article, "rewritten_text", None):
-        pdf.setFont("Helvetica-Bold", 14)
-        pdf.drawString(50, y, "Rewritten Text:")
-        pdf.setFont("Helvetica", 12)
-        y -= 20
-        for line in article.rewritten_text.split("\n"):
-            pdf.drawString(50, y, line)
-            y -= 15
-            if y < 50:
-                pdf.showPage()
-                y = 800
-
-    pdf.save()
-    buffer.seek(0)
+def download_article_pdf(article_id: int, session: Session = Depends(get_db)):
+    sources = load_pdf_sources(session, [article_id])
+    if not sources:
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    [source] = sources
+    pdf = source["file"] or open_rendered(ensure_pdf(source["fields"], source["stamp"]))
 
     return StreamingResponse(
-        buffer,
+        iter_file(pdf),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={article.title}.pdf"}
-    )
\ No newline at end of file
+        headers=download_filename(source["title"]),
+    )
+
+@app.post("/articles/export")
+async def export_articles_pdf(data: ExportRequest, session: Session = Depends(get_db)):
+    ids = list(dict.fromkeys(data.ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No articles provided")
+    if len(ids) > PDF_EXPORT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {PDF_EXPORT_MAX_ITEMS} articles per export",
+        )
+
+    sources = await run_in_threadpool(load_pdf_sources, session, ids)
+    # Return the connection to the pool before rendering, not after the response
+    await run_in_threadpool(session.close)
+    try:
+        missing = set(ids) - {source["id"] for source in sources}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Articles not found: {sorted(missing)}")
+
+        # Uncached articles render in parallel across the process pool
+        loop = asyncio.get_running_loop()
+        pending = [source for source in sources if source["file"] is None]
+        rendered = await asyncio.gather(*(
+            loop.run_in_executor(get_pool(), ensure_pdf, source["fields"], source["stamp"])
+            for source in pending
+        ))
+        for source, path in zip(pending, rendered):
+            source["file"] = open_rendered(path)
+
+        archive = await run_in_threadpool(build_zip, {
+            f"{source['id']}.pdf": source["file"] for source in sources
+        })
+    finally:
+        close_sources(sources)
+
+    # iter_file removes the ZIP when it is closed; the background task covers
+    # a client that disconnects before the body is streamed at all
+    return StreamingResponse(
+        iter_file(archive, delete=True),
+        media_type="application/zip",
+        headers=download_filename("articles", ".zip"),
+        background=BackgroundTask(discard, archive.name),
+    )
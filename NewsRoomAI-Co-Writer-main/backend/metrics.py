@@ -0,0 +1,276 @@
+import time
+import bisect
+import contextvars
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from starlette.routing import Match
+
+# Route template of the request being served; LLM token counters are split by it
+current_endpoint: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_endpoint", default="background"
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues, extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return super().render() + [
+            f"{self.name}{self._labels(key)} {_number(value)}" for key, value in values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # Per label set: [per-bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(counts), total[0]) for key, (counts, total) in self._values.items()}
+
+        lines = super().render()
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            cumulative += counts[-1]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY: List[_Metric] = []
+# Called before rendering to refresh gauges that mirror other components' state
+COLLECTORS: List[Callable[[], None]] = []
+
+
+def render_metrics() -> str:
+    for collect in COLLECTORS:
+        collect()
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# METRICS
+# =========================
+
+http_requests = Counter(
+    "newsroom_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]
+)
+http_latency = Histogram(
+    "newsroom_http_request_seconds", "HTTP request latency, including streamed bodies.", ["method", "route"]
+)
+http_in_flight = Gauge(
+    "newsroom_http_requests_in_flight", "HTTP requests currently being served.", ["route"]
+)
+
+stage_latency = Histogram(
+    "newsroom_stage_seconds", "Latency of pipeline stages.", ["stage"]
+)
+
+llm_requests = Counter(
+    "newsroom_llm_requests_total", "LLM calls by endpoint and outcome.", ["endpoint", "model", "outcome"]
+)
+llm_latency = Histogram(
+    "newsroom_llm_request_seconds", "LLM call latency after leaving the scheduler queue.", ["model", "kind"]
+)
+llm_queue_wait = Histogram(
+    "newsroom_llm_queue_wait_seconds", "Time LLM calls waited in the scheduler queue.", ["priority"]
+)
+llm_prompt_tokens = Counter(
+    "newsroom_llm_prompt_tokens_total", "Prompt tokens reported by the LLM.", ["endpoint", "model"]
+)
+llm_completion_tokens = Counter(
+    "newsroom_llm_completion_tokens_total", "Completion tokens reported by the LLM.", ["endpoint", "model"]
+)
+
+db_query_latency = Histogram(
+    "newsroom_db_query_seconds", "Database statement latency.", ["operation"], buckets=DB_BUCKETS
+)
+
+
+@contextmanager
+def time_stage(stage: str):
+    with stage_latency.time(stage=stage):
+        yield
+
+
+def timed_stage(stage: str):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_latency.time(stage=stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_usage(model: str, usage):
+    if usage is None:
+        return
+    endpoint = current_endpoint.get()
+    llm_prompt_tokens.inc(getattr(usage, "prompt_tokens", 0) or 0, endpoint=endpoint, model=model)
+    llm_completion_tokens.inc(getattr(usage, "completion_tokens", 0) or 0, endpoint=endpoint, model=model)
+
+
+# =========================
+# INTEGRATIONS
+# =========================
+
+def instrument_engine(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        db_query_latency.observe(time.perf_counter() - started, operation=operation)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # A failed statement never reaches after_cursor_execute
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            started.pop()
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware so streamed responses are timed to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _route(self, scope) -> str:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unknown")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = self._route(scope)
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = current_endpoint.set(route)
+        started = time.perf_counter()
+        http_in_flight.inc(route=route)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec(route=route)
+            http_latency.observe(time.perf_counter() - started, method=method, route=route)
+            http_requests.inc(method=method, route=route, status=status["code"])
+            current_endpoint.reset(token)
@@ -1,7 +1,10 @@
-from typing import Optional, List, Dict
-from datetime import datetime
+from typing import Optional, List, Dict, Any
+from datetime import date, datetime
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, JSON, Index
+from sqlalchemy.orm import deferred
+
+from compressed import CompressedText, CompressedJSON
 
 
 class User(SQLModel, table=True):
@@ -19,13 +22,32 @@ class User(SQLModel, table=True):
     reset_token_expiry: Optional[datetime] = None
 
 
+# Bulky article columns: stored compressed and only loaded when accessed.
+# Use undefer_group("body") on queries that need the full article.
+_article_content = Column("content", CompressedText, nullable=False)
+_article_rewritten_text = Column("rewritten_text", CompressedText)
+_article_deep_analysis = Column("deep_analysis", CompressedJSON)
+
+
 class Article(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) in descending order
+        Index("ix_article_created_at_id", "created_at", "id"),
+    )
+    __mapper_args__ = {
+        "properties": {
+            "content": deferred(_article_content, group="body"),
+            "rewritten_text": deferred(_article_rewritten_text, group="body"),
+            "deep_analysis": deferred(_article_deep_analysis, group="body"),
+        }
+    }
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     title: str
-    content: str  # original article text
+    content: str = Field(sa_column=_article_content)  # original article text
 
-    bias_score: int
+    bias_score: int = Field(index=True)
     summary: str
     explanation: str
 
@@ -35,12 +57,139 @@ class Article(SQLModel, table=True):
 
     deep_analysis: Optional[Dict] = Field(
         default=None,
+        sa_column=_article_deep_analysis
+    )
+
+    rewritten_text: Optional[str] = Field(default=None, sa_column=_article_rewritten_text)
+
+    author_id: int = Field(default=1, index=True)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = Field(default=None)
+
+class CachedResult(SQLModel, table=True):
+    key: str = Field(primary_key=True)
+    namespace: str = Field(index=True)
+
+    value: Optional[Any] = Field(
+        default=None,
+        sa_column=Column(JSON)
+    )
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = Field(default=None, index=True)
+
+
+class AnalysisJob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    status: str = Field(default="queued", index=True)  # queued | running | done | failed
+    text: Optional[str] = None
+    link: Optional[str] = None
+
+    article_id: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    # Renewed by the running worker; a running job past its lease is requeued
+    lease_until: Optional[datetime] = None
+
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class RequestClaim(SQLModel, table=True):
+    # Idempotency keys and cross-process single-flight share this table
+    key: str = Field(primary_key=True)
+    request_hash: str
+
+    state: str = "pending"  # pending | done
+    owner: str
+    status_code: Optional[int] = None
+    response: Optional[Any] = Field(
+        default=None,
+        sa_column=Column(JSON)
+    )
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Pending: lease after which another process may take over; done: replay TTL
+    expires_at: datetime = Field(index=True)
+
+
+class ArticleFingerprint(SQLModel, table=True):
+    article_id: int = Field(primary_key=True)
+
+    signature: List[int] = Field(
+        default_factory=list,
+        sa_column=Column(JSON)
+    )
+
+    # Set when this article reused the analysis of a near-identical one
+    duplicate_of: Optional[int] = Field(default=None, index=True)
+
+
+class ArticleLSHBucket(SQLModel, table=True):
+    bucket: str = Field(primary_key=True)
+    article_id: int = Field(primary_key=True, index=True)
+
+
+class RewriteState(SQLModel, table=True):
+    article_id: int = Field(primary_key=True)
+
+    # Parallel lists: hash of each source paragraph and its rewrite
+    source_hashes: List[str] = Field(
+        default_factory=list,
+        sa_column=Column(JSON)
+    )
+    rewritten_paragraphs: List[str] = Field(
+        default_factory=list,
         sa_column=Column(JSON)
     )
 
-    rewritten_text: Optional[str] = None  
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    author_id: int = 1
+
+class RewriteHistory(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    article_id: int = Field(index=True)
+
+    diff: str  # unified diff from the previous rewritten_text
+    paragraphs_rewritten: Optional[int] = None
+    paragraphs_reused: Optional[int] = None
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: Optional[datetime] = Field(default=None)
\ No newline at end of file
+
+
+class ArticleBiasDaily(SQLModel, table=True):
+    # Article counts per (day, author, score); analytics read this instead of article
+    day: date = Field(primary_key=True)
+    author_id: int = Field(primary_key=True)
+    bias_score: int = Field(primary_key=True)
+
+    articles: int = 0
+
+
+class IngestItem(SQLModel, table=True):
+    # Feed ingest checkpoint; key is pipeline.source_key() of the item
+    key: str = Field(primary_key=True)
+    feed: str = Field(index=True)
+
+    status: str = Field(default="pending", index=True)  # pending | fetched | analyzed | done | skipped | failed
+    link: Optional[str] = None
+    title: Optional[str] = None
+    # Kept so a resumed run neither re-fetches nor re-analyzes finished stages
+    text: Optional[str] = Field(default=None, sa_column=Column(CompressedText))
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(CompressedJSON))
+
+    article_id: Optional[int] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AppMeta(SQLModel, table=True):
+    # One-off markers and versions, e.g. that the rollup backfill has run
+    key: str = Field(primary_key=True)
+    value: str
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from model import Article
+
+ARTICLE_FIELDS = list(Article.__table__.columns.keys())
+# Always selected so every row can produce the next cursor
+CURSOR_FIELDS = ["id", "created_at"]
+
+
+def encode_cursor(created_at: datetime, article_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), article_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        created_at, article_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(article_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in ARTICLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return CURSOR_FIELDS + [f for f in requested if f not in CURSOR_FIELDS]
+
+
+def after_cursor(cursor: str):
+    created_at, article_id = decode_cursor(cursor)
+    return or_(
+        Article.created_at < created_at,
+        and_(Article.created_at == created_at, Article.id < article_id),
+    )
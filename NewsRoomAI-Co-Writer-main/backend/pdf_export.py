@@ -0,0 +1,185 @@
+import os
+import re
+import glob
+import shutil
+import tempfile
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+PDF_CACHE_DIR = os.getenv(
+    "PDF_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".pdf_cache")
+)
+PDF_EXPORT_PROCESSES = int(os.getenv("PDF_EXPORT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+PDF_EXPORT_MAX_ITEMS = int(os.getenv("PDF_EXPORT_MAX_ITEMS", "200"))
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Bump when the layout changes so cached files are re-rendered
+RENDER_VERSION = "2"
+
+PDF_FIELDS = ("id", "title", "bias_score", "summary", "content", "rewritten_text")
+
+
+# =========================
+# RENDERING
+# =========================
+
+def _paragraphs(text: str, style) -> List:
+    from reportlab.platypus import Paragraph
+
+    # Blank lines separate paragraphs; single newlines are kept as line breaks
+    blocks = re.split(r"\n\s*\n", (text or "").strip())
+    return [
+        Paragraph(escape(block.strip()).replace("\n", "<br/>"), style)
+        for block in blocks
+        if block.strip()
+    ]
+
+
+def render_pdf(article: Dict, path: str):
+    """Render one article to path; runs in worker processes, so it takes a plain dict."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    styles = getSampleStyleSheet()
+    story = [
+        Paragraph(escape(article["title"] or ""), styles["Title"]),
+        Paragraph(f"Bias Score: {article['bias_score']}", styles["Normal"]),
+        Spacer(1, 12),
+        Paragraph("Summary:", styles["Heading2"]),
+        *_paragraphs(article["summary"], styles["BodyText"]),
+        Paragraph("Content:", styles["Heading2"]),
+        *_paragraphs(article["content"], styles["BodyText"]),
+    ]
+    if article.get("rewritten_text"):
+        story += [
+            Paragraph("Rewritten Text:", styles["Heading2"]),
+            *_paragraphs(article["rewritten_text"], styles["BodyText"]),
+        ]
+
+    # Written next to the target and moved into place so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        SimpleDocTemplate(
+            tmp,
+            pagesize=A4,
+            leftMargin=2 * cm,
+            rightMargin=2 * cm,
+            topMargin=2 * cm,
+            bottomMargin=2 * cm,
+            title=article["title"] or "",
+        ).build(story)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+# =========================
+# CACHE
+# =========================
+
+def cache_path(article_id: int, updated_at: Optional[datetime]) -> str:
+    stamp = updated_at.strftime("%Y%m%dT%H%M%S%f") if updated_at else "0"
+    return os.path.join(PDF_CACHE_DIR, f"{article_id}-{stamp}-v{RENDER_VERSION}.pdf")
+
+
+def open_cached_pdf(article_id: int, updated_at: Optional[datetime]) -> Optional[BinaryIO]:
+    # Opened right away rather than checked for: a newer render deletes stale
+    # files, and an open handle keeps reading after the unlink
+    try:
+        return open(cache_path(article_id, updated_at), "rb")
+    except FileNotFoundError:
+        return None
+
+
+def discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_cached_pdfs(article_id: int, keep: Optional[str] = None):
+    for path in glob.glob(os.path.join(PDF_CACHE_DIR, f"{article_id}-*.pdf")):
+        if path != keep:
+            discard(path)
+
+
+def ensure_pdf(article: Dict, updated_at: Optional[datetime]) -> str:
+    path = cache_path(article["id"], updated_at)
+    if not os.path.exists(path):
+        os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+        render_pdf(article, path)
+        # Older renders of this article are stale now
+        remove_cached_pdfs(article["id"], keep=path)
+    return path
+
+
+def iter_file(f: BinaryIO, delete: bool = False) -> Iterator[bytes]:
+    """Stream an already open file; delete=True also removes it once closed."""
+    try:
+        with f:
+            while chunk := f.read(STREAM_CHUNK_BYTES):
+                yield chunk
+    finally:
+        if delete:
+            discard(f.name)
+
+
+def download_filename(title: str, suffix: str = ".pdf") -> Dict[str, str]:
+    ascii_name = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode()
+    ascii_name = re.sub(r"[^A-Za-z0-9._ -]+", "", ascii_name).strip()[:80] or "article"
+    return {
+        "Content-Disposition": (
+            f'attachment; filename="{ascii_name}{suffix}"; '
+            f"filename*=UTF-8''{quote((title or 'article')[:80] + suffix)}"
+        )
+    }
+
+
+# =========================
+# BULK EXPORT
+# =========================
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PDF_EXPORT_PROCESSES)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def build_zip(files: Dict[str, BinaryIO]) -> BinaryIO:
+    """Bundle open PDFs into a temporary ZIP, returned open for streaming.
+
+    The caller owns the returned file and removes it after the response.
+    """
+    fd, zip_path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    try:
+        # PDFs are already compressed; storing them keeps the ZIP step I/O bound
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for name, f in files.items():
+                with archive.open(name, "w") as entry:
+                    shutil.copyfileobj(f, entry, STREAM_CHUNK_BYTES)
+        return open(zip_path, "rb")
+    except BaseException:
+        discard(zip_path)
+        raise
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import undefer_group
+from sqlmodel import Session, select
+
+from database import engine
+from model import Article
+from ai import analyze_text_async, fetch_article_from_link, bias_label_for_score
+from search import index_article
+from dedupe import find_near_duplicate, reused_analysis, fingerprint_article
+from prescore import prescore
+from analytics import add_to_rollups
+from cache import normalize_text
+from fetcher import canonical_url
+from metrics import time_stage, timed_stage
+
+
+def title_from_text(text: str) -> str:
+    return " ".join(text.strip().split("\n")[0].split()[:8])
+
+
+async def resolve_source(text: str | None, link: str | None) -> Tuple[str, str]:
+    # Prefer link if present
+    if link:
+        with time_stage("fetch"):
+            title, text = await asyncio.to_thread(fetch_article_from_link, link)
+    else:
+        title = title_from_text(text or "")
+
+    if not text or not text.strip():
+        raise ValueError("No article content found")
+
+    return title, text
+
+
+def source_key(text: str | None, link: str | None) -> str:
+    # Same precedence as resolve_source: a link wins over pasted text
+    if link:
+        return "link:" + canonical_url(link)
+    digest = hashlib.sha256(normalize_text(text or "").encode("utf-8")).hexdigest()
+    return "text:" + digest
+
+
+def build_article(title: str, text: str, ai_result: Dict) -> Article:
+    return Article(
+        title=title,
+        content=text,
+        bias_score=ai_result["bias_score"],
+        summary=ai_result["summary"],
+        perspectives=ai_result["perspectives"],
+        explanation=ai_result["explanation"],
+        deep_analysis=ai_result.get("deep_analysis"),
+        author_id=1
+    )
+
+
+def article_payload(article: Article, ai_result: Dict) -> Dict:
+    payload = {
+        "id": article.id,
+        "title": article.title,
+        "content": article.content,
+        "bias_score": article.bias_score,
+        "bias_label": ai_result.get("bias_label") or "Unknown",
+        "summary": article.summary,
+        "perspectives": article.perspectives,
+        "explanation": article.explanation,
+        "deep_analysis": article.deep_analysis,
+    }
+    if ai_result.get("duplicate_of"):
+        payload["duplicate_of"] = ai_result["duplicate_of"]
+        payload["similarity"] = ai_result["similarity"]
+    return payload
+
+
+async def find_reusable_analysis(text: str) -> Optional[Dict]:
+    # Syndicated copies reuse the analysis of the first version we saw
+    duplicate = await asyncio.to_thread(find_near_duplicate, text)
+    if not duplicate:
+        return None
+
+    duplicate_id, score = duplicate
+    ai_result = await asyncio.to_thread(reused_analysis, duplicate_id)
+    if ai_result is None:
+        return None
+
+    ai_result["bias_label"] = bias_label_for_score(ai_result["bias_score"])
+    ai_result["duplicate_of"] = duplicate_id
+    ai_result["similarity"] = round(score, 3)
+    return ai_result
+
+
+async def analyze_resolved(title: str, text: str) -> Tuple[Article, Dict]:
+    with time_stage("dedupe_lookup"):
+        ai_result = await find_reusable_analysis(text)
+    if ai_result is None:
+        with time_stage("analyze"):
+            ai_result = await analyze_text_async(text)
+
+    return build_article(title, text, ai_result), ai_result
+
+
+async def analyze_source(text: str | None, link: str | None) -> Tuple[Article, Dict]:
+    title, text = await resolve_source(text, link)
+    return await analyze_resolved(title, text)
+
+
+async def prescore_gate(text: str, threshold: int | None) -> Optional[Dict]:
+    # Returns the skip payload when the lexicon pre-score is under the threshold.
+    # Scoring is ~0.3 ms for a typical article but linear in its length, so it
+    # runs off the event loop.
+    if threshold is None:
+        return None
+    with time_stage("prescore"):
+        score = await asyncio.to_thread(prescore, text)
+    if score >= threshold:
+        return None
+    return skipped_payload(score, threshold)
+
+
+def skipped_payload(score: int, threshold: int) -> Dict:
+    return {
+        "skipped": True,
+        "prescore": score,
+        "prescore_threshold": threshold,
+        "bias_label": bias_label_for_score(score),
+    }
+
+
+def add_articles(
+    session: Session,
+    articles: List[Article],
+    duplicate_of: Optional[List[Optional[int]]] = None,
+):
+    """Insert articles with their search, fingerprint and rollup rows; the caller commits."""
+    duplicate_of = duplicate_of or [None] * len(articles)
+    session.add_all(articles)
+    session.flush()
+    for article, original_id in zip(articles, duplicate_of):
+        index_article(session, article)
+        fingerprint_article(session, article, original_id)
+    add_to_rollups(session, articles)
+
+
+@timed_stage("save")
+def save_articles(
+    articles: List[Article],
+    duplicate_of: Optional[List[Optional[int]]] = None,
+) -> List[Article]:
+    if not articles:
+        return articles
+
+    with Session(engine) as session:
+        add_articles(session, articles, duplicate_of)
+        session.commit()
+        # One reload for the whole batch; refresh() would skip the deferred body
+        session.exec(
+            select(Article)
+            .where(Article.id.in_([article.id for article in articles]))
+            .options(undefer_group("body"))
+            .execution_options(populate_existing=True)
+        ).all()
+    return articles
@@ -0,0 +1,109 @@
+import os
+import re
+from collections import Counter
+from typing import TYPE_CHECKING, Dict
+
+from startup import timed_lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Unset means every article goes to the LLM
+PRESCORE_THRESHOLD = int(os.environ["PRESCORE_THRESHOLD"]) if os.getenv("PRESCORE_THRESHOLD") else None
+
+LOADED = """
+slammed blasted lashed ripped smashed destroyed crushed attacked assault radical extremist
+extremists regime thugs mob corrupt corruption propaganda disgraceful disastrous disaster
+catastrophic catastrophe shocking outrageous outrage scandal scandalous betrayal betrayed
+traitor traitors evil horrific horrifying terrifying chaos chaotic furious fury rage
+heroic brave hero villain villains shameful shameless ruthless brutal brutally draconian
+tyranny tyrant dictator puppet elite elites woke fascist fascists communist socialist
+insane absurd ridiculous pathetic lies lied liar liars hoax sham rigged stolen crooked
+devastating slaughter massacre invasion flood swarm crackdown unprecedented bombshell
+""".split()
+
+HEDGING = """
+allegedly reportedly apparently seemingly purportedly supposedly perhaps possibly
+may might could arguably rumored rumoured unconfirmed speculation speculated
+""".split()
+
+INTENSIFIERS = """
+very extremely totally absolutely completely utterly clearly obviously undeniably
+incredibly truly deeply highly hugely massively entirely simply literally
+""".split()
+
+FIRST_PERSON = "i we our us my me ourselves".split()
+
+PHRASES = {
+    ("so", "called"): "loaded",
+    ("sources", "say"): "hedging",
+    ("it", "is", "believed"): "hedging",
+    ("critics", "say"): "hedging",
+}
+
+LEXICONS = ["loaded", "hedging", "intensifier", "first_person"]
+FEATURES = LEXICONS + ["exclamations", "questions", "all_caps", "quotes"]
+
+# Logistic weights over rates per 100 words / per sentence
+WEIGHTS = (0.95, 0.35, 0.45, 0.30, 1.20, 0.60, 0.80, -0.25)
+INTERCEPT = -1.6
+
+_VOCAB: Dict[str, int] = {}
+for _index, _words in enumerate([LOADED, HEDGING, INTENSIFIERS, FIRST_PERSON]):
+    for _word in _words:
+        _VOCAB.setdefault(_word, _index)
+
+# Matched on the space-joined, lowercased token stream, so phrases span line breaks
+_PHRASE_RE = re.compile(
+    " (" + "|".join(re.escape(" ".join(phrase)) for phrase in PHRASES) + ")(?= )"
+)
+_PHRASE_LEXICONS = {" ".join(phrase): LEXICONS.index(kind) for phrase, kind in PHRASES.items()}
+
+_WORD_RE = re.compile(r"[A-Za-z']+")
+_SENTENCE_RE = re.compile(r"[.!?]+")
+
+
+def _numpy():
+    with timed_lazy_import("numpy"):
+        import numpy
+    return numpy
+
+
+def features(text: str) -> "np.ndarray":
+    """Feature vector in FEATURES order for one document.
+
+    Tokens are tallied by Counter in C and phrases by one regex, so the
+    Python-level work is per distinct word rather than per token.
+    """
+    np = _numpy()
+    tokens = _WORD_RE.findall(text)
+
+    lexicon_counts = [0] * len(LEXICONS)
+    all_caps = 0
+    for token, n in Counter(tokens).items():
+        lexicon = _VOCAB.get(token.lower())
+        if lexicon is not None:
+            lexicon_counts[lexicon] += n
+        if len(token) > 2 and token.isupper():
+            all_caps += n
+    for phrase in _PHRASE_RE.findall(f" {' '.join(tokens).lower()} "):
+        lexicon_counts[_PHRASE_LEXICONS[phrase]] += 1
+
+    per_100_words = 100.0 / max(len(tokens), 1)
+    per_sentence = 1.0 / (len(_SENTENCE_RE.findall(text)) or 1)
+    return np.array(
+        [count * per_100_words for count in lexicon_counts]
+        + [
+            text.count("!") * per_sentence,
+            text.count("?") * per_sentence,
+            all_caps * per_100_words,
+            (text.count('"') + text.count("“")) * per_sentence,
+        ]
+    )
+
+
+def prescore(text: str) -> int:
+    """Provisional bias score on the 0–100 scale used by Article.bias_score."""
+    np = _numpy()
+    logit = float(features(text) @ np.asarray(WEIGHTS)) + INTERCEPT
+    return int(np.rint(100.0 / (1.0 + np.exp(-logit))))
@@ -1,10 +1,16 @@
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
+import asyncio
+from typing import AsyncIterator
 
-load_dotenv()
+from cache import result_cache, prompt_version, make_key
+from llm_scheduler import scheduler
+from chunking import chunk_text, estimate_tokens
 
-client = OpenAI(api_key=os.getenv("LLM_API_KEY"))
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0.3
+MAX_TOKENS = 800
+# Articles above this size are rewritten chunk by chunk in parallel
+REWRITE_CHUNK_TOKENS = int(os.getenv("REWRITE_CHUNK_TOKENS", "1000"))
 
 REWRITE_PROMPT = """
 You are a professional neutral news editor.
@@ -22,15 +28,71 @@ Rules:
 Article:
 """
 
-def rewrite_article_neutral(text: str) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": REWRITE_PROMPT},
-            {"role": "user", "content": text},
-        ],
-        temperature=0.3,
-        max_tokens=800
+REWRITE_PROMPT_VERSION = prompt_version(REWRITE_PROMPT)
+
+async def rewrite_article_neutral_async(text: str) -> str:
+    return await result_cache.aget_or_compute(
+        "rewrite",
+        text,
+        REWRITE_PROMPT_VERSION,
+        MODEL,
+        TEMPERATURE,
+        lambda: _rewrite_long_async(text),
+    )
+
+async def _rewrite_long_async(text: str) -> str:
+    chunks = chunk_text(text, REWRITE_CHUNK_TOKENS)
+    if len(chunks) == 1:
+        return await _rewrite_uncached_async(text)
+
+    parts = await asyncio.gather(
+        *(rewrite_article_neutral_async(chunk) for chunk in chunks)
+    )
+    return "\n\n".join(parts)
+
+def _max_tokens_for(text: str) -> int:
+    # A neutral rewrite is about as long as the source; leave some headroom
+    return max(MAX_TOKENS, int(estimate_tokens(text) * 1.5))
+
+def _rewrite_messages(text: str):
+    return [
+        {"role": "system", "content": REWRITE_PROMPT},
+        {"role": "user", "content": text},
+    ]
+
+async def _rewrite_uncached_async(text: str) -> str:
+    response = await scheduler.chat_async(
+        model=MODEL,
+        messages=_rewrite_messages(text),
+        temperature=TEMPERATURE,
+        max_tokens=_max_tokens_for(text)
     )
 
-    return response.choices[0].message.content.strip()
\ No newline at end of file
+    return response.choices[0].message.content.strip()
+
+
+async def stream_rewrite_article_neutral(text: str) -> AsyncIterator[str]:
+    key = make_key("rewrite", text, REWRITE_PROMPT_VERSION, MODEL, TEMPERATURE)
+    cached = await asyncio.to_thread(result_cache.get, "rewrite", key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    # Leaving the block closes the response, which aborts the upstream
+    # generation when the client goes away
+    async with scheduler.stream_async(
+        model=MODEL,
+        messages=_rewrite_messages(text),
+        temperature=TEMPERATURE,
+        max_tokens=_max_tokens_for(text)
+    ) as stream:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+
+    await asyncio.to_thread(result_cache.set, "rewrite", key, "".join(parts).strip())
@@ -0,0 +1,195 @@
+import asyncio
+import difflib
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import undefer
+from sqlmodel import Session, select
+
+from database import engine
+from model import Article, RewriteState, RewriteHistory
+from cache import normalize_text
+from chunking import estimate_tokens, split_paragraphs
+from rewrite_ai import REWRITE_CHUNK_TOKENS, rewrite_article_neutral_async
+from search import index_article
+
+
+def paragraph_hash(paragraph: str) -> str:
+    return hashlib.sha256(normalize_text(paragraph).encode("utf-8")).hexdigest()[:16]
+
+
+def rewrite_diff(old: str | None, new: str) -> str:
+    return "\n".join(difflib.unified_diff(
+        (old or "").splitlines(),
+        new.splitlines(),
+        fromfile="previous",
+        tofile="current",
+        n=0,
+        lineterm="",
+    ))
+
+
+# =========================
+# HISTORY
+# =========================
+
+def record_rewrite(
+    session: Session,
+    article: Article,
+    rewritten_text: str,
+    rewritten: Optional[int] = None,
+    reused: Optional[int] = None,
+):
+    """Set article.rewritten_text and keep only a diff of what changed."""
+    if article.rewritten_text == rewritten_text:
+        return
+
+    session.add(RewriteHistory(
+        article_id=article.id,
+        diff=rewrite_diff(article.rewritten_text, rewritten_text),
+        paragraphs_rewritten=rewritten,
+        paragraphs_reused=reused,
+    ))
+    article.rewritten_text = rewritten_text
+    article.updated_at = datetime.utcnow()
+    session.add(article)
+    index_article(session, article)
+
+
+def rewrite_history(session: Session, article_id: int) -> List[RewriteHistory]:
+    return session.exec(
+        select(RewriteHistory)
+        .where(RewriteHistory.article_id == article_id)
+        .order_by(RewriteHistory.id)
+    ).all()
+
+
+def remove_rewrite_tracking(session: Session, article_id: int):
+    session.execute(delete(RewriteState).where(RewriteState.article_id == article_id))
+    session.execute(delete(RewriteHistory).where(RewriteHistory.article_id == article_id))
+
+
+def seed_rewrite_state(session: Session, article_id: int, source_text: str, rewritten_text: str):
+    """Rebuild per-paragraph state from a whole-article rewrite.
+
+    Paragraphs can only be paired up when the rewrite kept the source's
+    paragraph count; otherwise the old state is dropped as stale.
+    """
+    sources = split_paragraphs(source_text)
+    rewrites = split_paragraphs(rewritten_text)
+    if not sources or len(sources) != len(rewrites):
+        session.execute(delete(RewriteState).where(RewriteState.article_id == article_id))
+        return
+
+    state = session.get(RewriteState, article_id) or RewriteState(article_id=article_id)
+    state.source_hashes = [paragraph_hash(p) for p in sources]
+    state.rewritten_paragraphs = rewrites
+    state.updated_at = datetime.utcnow()
+    session.add(state)
+
+
+def prune_rewrite_state(session: Session, article: Article):
+    """Keep only rewrites of paragraphs that are still in article.content."""
+    state = session.get(RewriteState, article.id)
+    if not state:
+        return
+
+    current = {paragraph_hash(p) for p in split_paragraphs(article.content)}
+    kept = [
+        (h, p) for h, p in zip(state.source_hashes, state.rewritten_paragraphs)
+        if h in current
+    ]
+    state.source_hashes = [h for h, _ in kept]
+    state.rewritten_paragraphs = [p for _, p in kept]
+    state.updated_at = datetime.utcnow()
+    session.add(state)
+
+
+# =========================
+# INCREMENTAL REWRITE
+# =========================
+
+def _load(article_id: int):
+    with Session(engine) as session:
+        article = session.get(Article, article_id, options=[undefer(Article.content)])
+        state = session.get(RewriteState, article_id)
+        return article, state
+
+
+def _save(article_id: int, hashes: List[str], paragraphs: List[str], rewritten: int, reused: int) -> str:
+    text = "\n\n".join(paragraphs)
+    with Session(engine) as session:
+        article = session.get(Article, article_id)
+        if not article:
+            raise LookupError("Article not found")
+
+        state = session.get(RewriteState, article_id) or RewriteState(article_id=article_id)
+        state.source_hashes = hashes
+        state.rewritten_paragraphs = paragraphs
+        state.updated_at = datetime.utcnow()
+        session.add(state)
+
+        record_rewrite(session, article, text, rewritten, reused)
+        session.commit()
+    return text
+
+
+def _batches(paragraphs: List[str]) -> List[List[str]]:
+    batches, current, tokens = [], [], 0
+    for paragraph in paragraphs:
+        size = estimate_tokens(paragraph)
+        if current and tokens + size > REWRITE_CHUNK_TOKENS:
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(paragraph)
+        tokens += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _rewrite_batch(batch: List[str]) -> List[str]:
+    if len(batch) == 1:
+        return [await rewrite_article_neutral_async(batch[0])]
+
+    rewritten = split_paragraphs(await rewrite_article_neutral_async("\n\n".join(batch)))
+    if len(rewritten) == len(batch):
+        return rewritten
+    # The model merged or split paragraphs; rewrite this batch one by one
+    return list(await asyncio.gather(*(rewrite_article_neutral_async(p) for p in batch)))
+
+
+async def incremental_rewrite(article_id: int) -> Dict:
+    article, state = await asyncio.to_thread(_load, article_id)
+    if not article:
+        raise LookupError("Article not found")
+
+    paragraphs = split_paragraphs(article.content)
+    if not paragraphs:
+        raise ValueError("No article text provided")
+
+    hashes = [paragraph_hash(p) for p in paragraphs]
+    known = dict(zip(state.source_hashes, state.rewritten_paragraphs)) if state else {}
+
+    # Only new or edited paragraphs go to the LLM; moved ones are matched by hash
+    pending = {h: p for h, p in zip(hashes, paragraphs) if h not in known}
+    # Pending paragraphs are packed up to REWRITE_CHUNK_TOKENS per LLM call
+    batches = await asyncio.gather(*(_rewrite_batch(b) for b in _batches(list(pending.values()))))
+    known.update(zip(pending.keys(), (p for batch in batches for p in batch)))
+
+    rewritten_text = await asyncio.to_thread(
+        _save,
+        article_id,
+        hashes,
+        [known[h] for h in hashes],
+        len(pending),
+        len(hashes) - len(pending),
+    )
+
+    return {
+        "rewritten_text": rewritten_text,
+        "paragraphs_rewritten": len(pending),
+        "paragraphs_reused": len(hashes) - len(pending),
+    }
@@ -0,0 +1,216 @@
+import os
+import re
+from typing import Dict, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import undefer_group
+from sqlmodel import Session, select
+
+from database import engine
+from model import Article
+
+SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+
+if not re.fullmatch(r"[a-z_]+", SEARCH_LANGUAGE):
+    raise ValueError("SEARCH_LANGUAGE must be a Postgres text search configuration name")
+
+# The index flavour follows the DATABASE_URL dialect
+SEARCH_BACKEND = {
+    "sqlite": "fts5",
+    "postgresql": "tsvector",
+}.get(engine.dialect.name)
+
+INDEXED_FIELDS = ("title", "content", "summary", "rewritten_text")
+
+# SQLite: external-content FTS5 over a view that decompresses article text, so
+# the index holds no second copy of the bodies. Triggers keep it in step with
+# article; they call newsroom_text(), which database.py registers on every
+# connection, so article rows can't be written from tools that lack it.
+_FTS5_SETUP = [
+    "CREATE VIEW IF NOT EXISTS article_fts_source AS "
+    "SELECT id, title, newsroom_text(content) AS content, summary, "
+    "newsroom_text(rewritten_text) AS rewritten_text FROM article",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS article_fts USING fts5("
+    "title, content, summary, rewritten_text, "
+    "content = 'article_fts_source', content_rowid = 'id', "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS article_fts_insert AFTER INSERT ON article BEGIN "
+    "INSERT INTO article_fts (rowid, title, content, summary, rewritten_text) VALUES ("
+    "new.id, new.title, newsroom_text(new.content), new.summary, newsroom_text(new.rewritten_text)); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS article_fts_delete AFTER DELETE ON article BEGIN "
+    "INSERT INTO article_fts (article_fts, rowid, title, content, summary, rewritten_text) VALUES ("
+    "'delete', old.id, old.title, newsroom_text(old.content), old.summary, "
+    "newsroom_text(old.rewritten_text)); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS article_fts_update "
+    "AFTER UPDATE OF title, content, summary, rewritten_text ON article BEGIN "
+    "INSERT INTO article_fts (article_fts, rowid, title, content, summary, rewritten_text) VALUES ("
+    "'delete', old.id, old.title, newsroom_text(old.content), old.summary, "
+    "newsroom_text(old.rewritten_text)); "
+    "INSERT INTO article_fts (rowid, title, content, summary, rewritten_text) VALUES ("
+    "new.id, new.title, newsroom_text(new.content), new.summary, newsroom_text(new.rewritten_text)); "
+    "END",
+]
+
+
+# =========================
+# INDEX SETUP
+# =========================
+
+def setup_search_index():
+    if SEARCH_BACKEND == "fts5":
+        _setup_fts5()
+    elif SEARCH_BACKEND == "tsvector":
+        _setup_tsvector()
+
+
+def _setup_fts5():
+    with engine.begin() as conn:
+        existing = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE name = 'article_fts'"
+        )).scalar()
+        stored_copy = existing is not None and "content_rowid" not in existing
+        if stored_copy:
+            # Older indexes kept their own uncompressed copy of every article
+            conn.execute(text("DROP TABLE article_fts"))
+        for statement in _FTS5_SETUP:
+            conn.execute(text(statement))
+        if existing is None or stored_copy:
+            conn.execute(text("INSERT INTO article_fts (article_fts) VALUES ('rebuild')"))
+
+
+def _setup_tsvector():
+    existed = inspect(engine).has_table("article_search")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS article_search ("
+            "article_id INTEGER PRIMARY KEY REFERENCES article(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        ))
+        # Headlines are built from the article itself now
+        conn.execute(text("ALTER TABLE article_search DROP COLUMN IF EXISTS excerpt"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_article_search_document "
+            "ON article_search USING GIN (document)"
+        ))
+
+    if not existed:
+        _backfill()
+
+
+def _backfill():
+    # Article text is decompressed in Python, so the backfill goes through the ORM
+    with Session(engine) as session:
+        statement = (
+            select(Article)
+            .options(undefer_group("body"))
+            .execution_options(yield_per=500)
+        )
+        for article in session.exec(statement):
+            index_article(session, article)
+        session.commit()
+
+
+def _pg_document(title: str, summary: str, content: str, rewritten: str) -> str:
+    cfg = f"'{SEARCH_LANGUAGE}'"
+    return (
+        f"setweight(to_tsvector({cfg}, coalesce({title}, '')), 'A') || "
+        f"setweight(to_tsvector({cfg}, coalesce({summary}, '')), 'B') || "
+        f"setweight(to_tsvector({cfg}, coalesce({content}, '')), 'C') || "
+        f"setweight(to_tsvector({cfg}, coalesce({rewritten}, '')), 'D')"
+    )
+
+
+# =========================
+# SYNC ON WRITE
+# =========================
+
+def index_article(session: Session, article: Article):
+    # Runs inside the caller's transaction so the index never drifts from the
+    # row; on SQLite the article triggers do this
+    if SEARCH_BACKEND != "tsvector":
+        return
+
+    params = {"id": article.id, **{f: getattr(article, f) or "" for f in INDEXED_FIELDS}}
+    session.execute(text(
+        f"INSERT INTO article_search (article_id, document) VALUES (:id, "
+        f"{_pg_document(':title', ':summary', ':content', ':rewritten_text')}) "
+        f"ON CONFLICT (article_id) DO UPDATE SET document = EXCLUDED.document"
+    ), params)
+
+
+def remove_article(session: Session, article_id: int):
+    if SEARCH_BACKEND == "tsvector":
+        session.execute(
+            text("DELETE FROM article_search WHERE article_id = :id"), {"id": article_id}
+        )
+
+
+# =========================
+# QUERY
+# =========================
+
+def _fts5_query(query: str) -> str:
+    # Quote every term so user input can't hit FTS5 query syntax errors
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search_articles(session: Session, query: str, limit: int, offset: int) -> List[Dict]:
+    if SEARCH_BACKEND == "fts5":
+        match = _fts5_query(query)
+        if not match:
+            return []
+        rows = session.execute(text(
+            "SELECT a.id, a.title, a.bias_score, a.created_at, "
+            "-bm25(article_fts, 10.0, 1.0, 4.0, 1.0) AS rank, "
+            "highlight(article_fts, 0, '<mark>', '</mark>') AS title_highlight, "
+            "snippet(article_fts, -1, '<mark>', '</mark>', '…', 24) AS snippet "
+            "FROM article_fts JOIN article a ON a.id = article_fts.rowid "
+            "WHERE article_fts MATCH :match "
+            "ORDER BY rank DESC LIMIT :limit OFFSET :offset"
+        ), {"match": match, "limit": limit, "offset": offset})
+    elif SEARCH_BACKEND == "tsvector":
+        # Rank and page first, then build headlines only for the page
+        rows = session.execute(text(
+            f"SELECT a.id, a.title, a.bias_score, a.created_at, page.rank, "
+            f"ts_headline('{SEARCH_LANGUAGE}', a.title, page.q, "
+            f"'StartSel=<mark>, StopSel=</mark>, HighlightAll=true') AS title_highlight "
+            f"FROM ("
+            f"  SELECT s.article_id, q, ts_rank_cd(s.document, q) AS rank "
+            f"  FROM article_search s, websearch_to_tsquery('{SEARCH_LANGUAGE}', :query) q "
+            f"  WHERE s.document @@ q "
+            f"  ORDER BY rank DESC LIMIT :limit OFFSET :offset"
+            f") page JOIN article a ON a.id = page.article_id "
+            f"ORDER BY page.rank DESC"
+        ), {"query": query, "limit": limit, "offset": offset})
+        results = [dict(row._mapping) for row in rows]
+        snippets = _pg_snippets(session, query, [r["id"] for r in results])
+        for result in results:
+            result["snippet"] = snippets.get(result["id"], "")
+        return results
+    else:
+        raise RuntimeError(f"Full-text search is not supported on {engine.dialect.name}")
+
+    return [dict(row._mapping) for row in rows]
+
+
+def _pg_snippets(session: Session, query: str, ids: List[int]) -> Dict[int, str]:
+    # Compressed bodies are decoded here, so a match anywhere in the article
+    # gets a headline; only the current page is decompressed
+    if not ids:
+        return {}
+    articles = session.exec(
+        select(Article).where(Article.id.in_(ids)).options(undefer_group("body"))
+    ).all()
+    bodies = {
+        a.id: "\n".join(filter(None, (a.summary, a.content, a.rewritten_text))) for a in articles
+    }
+    rows = session.execute(text(
+        f"SELECT t.id, ts_headline('{SEARCH_LANGUAGE}', t.body, "
+        f"websearch_to_tsquery('{SEARCH_LANGUAGE}', :query), "
+        f"'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=24, MinWords=8') "
+        f"FROM unnest(CAST(:ids AS integer[]), CAST(:bodies AS text[])) AS t(id, body)"
+    ), {"query": query, "ids": list(bodies), "bodies": list(bodies.values())})
+    return dict(rows.all())
@@ -0,0 +1,26 @@
+import os
+from dotenv import load_dotenv
+
+# The only load_dotenv call; modules import their configuration from here or
+# read os.getenv after importing this module.
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+SECRET_KEY = os.getenv("SECRET_KEY")
+
+LLM_API_KEY = os.getenv("LLM_API_KEY")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
+# "auto" creates only missing tables; "0" skips the schema check entirely
+DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "auto")
+
+# Seconds from process start to ready; unset disables the check
+COLD_START_BUDGET_SECONDS = (
+    float(os.environ["COLD_START_BUDGET_SECONDS"]) if os.getenv("COLD_START_BUDGET_SECONDS") else None
+)
+# Fail startup instead of logging when the budget is exceeded
+COLD_START_STRICT = os.getenv("COLD_START_STRICT", "0") == "1"
+# Time each first-party module import; off by default since it hooks every import
+STARTUP_IMPORT_TIMING = os.getenv("STARTUP_IMPORT_TIMING", "0") == "1"
@@ -0,0 +1,119 @@
+import os
+import time
+import logging
+import importlib.abc
+import importlib.machinery
+import sys
+from contextlib import contextmanager
+from typing import Dict
+
+from settings import COLD_START_BUDGET_SECONDS, COLD_START_STRICT, STARTUP_IMPORT_TIMING
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Import this module first so the clock starts before anything heavy loads
+PROCESS_STARTED = time.perf_counter()
+
+_imports: Dict[str, float] = {}
+_steps: Dict[str, float] = {}
+_lazy: Dict[str, float] = {}
+_ready_at: float | None = None
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Times first-party modules; times are inclusive of what each one imports."""
+
+    def find_spec(self, name, path, target=None):
+        if path is not None or name in _imports:
+            return None
+        # Resolve exactly as the path finder would and only claim our own files
+        spec = importlib.machinery.PathFinder.find_spec(name)
+        if (
+            spec is None
+            or not isinstance(spec.loader, importlib.machinery.SourceFileLoader)
+            or os.path.dirname(spec.origin) != BACKEND_DIR
+        ):
+            return None
+
+        exec_module = spec.loader.exec_module
+
+        def timed_exec(module):
+            started = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                _imports[name] = time.perf_counter() - started
+
+        spec.loader.exec_module = timed_exec
+        return spec
+
+
+if STARTUP_IMPORT_TIMING:
+    # Behind the built-in and frozen importers, just ahead of the path finder
+    sys.meta_path.insert(sys.meta_path.index(importlib.machinery.PathFinder), _ImportTimer())
+
+
+@contextmanager
+def timed(step: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps[step] = time.perf_counter() - started
+
+
+@contextmanager
+def timed_lazy_import(name: str):
+    # Heavy dependencies loaded on first use; shows what the first request paid
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _lazy.setdefault(name, time.perf_counter() - started)
+
+
+def mark_ready():
+    global _ready_at
+    _ready_at = time.perf_counter()
+    total = _ready_at - PROCESS_STARTED
+
+    if COLD_START_BUDGET_SECONDS is not None and total > COLD_START_BUDGET_SECONDS:
+        message = (
+            f"Cold start took {total:.2f}s, over the {COLD_START_BUDGET_SECONDS:.2f}s budget; "
+            f"slowest: {_slowest()}"
+        )
+        if COLD_START_STRICT:
+            raise RuntimeError(message)
+        logger.warning(message)
+    else:
+        logger.info("Cold start took %.2fs", total)
+
+
+def _slowest(n: int = 3) -> str:
+    timings = {**{f"import {k}": v for k, v in _imports.items()}, **_steps}
+    top = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:n]
+    return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in top)
+
+
+def startup_report() -> Dict:
+    def rounded(timings: Dict[str, float]) -> Dict[str, float]:
+        return {
+            name: round(seconds, 4)
+            for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True)
+        }
+
+    total = (_ready_at - PROCESS_STARTED) if _ready_at else None
+    return {
+        "ready": _ready_at is not None,
+        "cold_start_seconds": round(total, 4) if total is not None else None,
+        "budget_seconds": COLD_START_BUDGET_SECONDS,
+        "within_budget": (
+            None if total is None or COLD_START_BUDGET_SECONDS is None
+            else total <= COLD_START_BUDGET_SECONDS
+        ),
+        "imports": rounded(_imports),
+        "init": rounded(_steps),
+        "lazy_imports": rounded(_lazy),
+    }
@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+# Configuration is read at import time, so it has to be in place before any
+# backend module is imported. Tests never touch a real database or LLM.
+_TMP = tempfile.mkdtemp(prefix="newsroom-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/test.db"
+os.environ["LLM_API_KEY"] = "test"
+os.environ["LLM_BASE_URL"] = "http://127.0.0.1:9/v1"
+os.environ["INGEST_ROOT"] = os.path.join(_TMP, "ingest")
+os.environ["FETCH_CACHE_DIR"] = os.path.join(_TMP, "fetch_cache")
+os.environ["PDF_CACHE_DIR"] = os.path.join(_TMP, "pdf_cache")
+os.environ["JOB_INPROCESS_WORKERS"] = "0"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_article(client):
+    from database import engine
+    from model import Article
+
+    def make(content: str, **fields) -> int:
+        article = Article(
+            title=fields.pop("title", "Test article"),
+            content=content,
+            bias_score=fields.pop("bias_score", 40),
+            summary=fields.pop("summary", "Summary"),
+            explanation=fields.pop("explanation", "Explanation"),
+            perspectives=fields.pop("perspectives", []),
+            **fields,
+        )
+        with Session(engine) as session:
+            session.add(article)
+            session.commit()
+            return article.id
+
+    return make
+
+
+@pytest.fixture
+def fake_analysis(monkeypatch):
+    """Stands in for the LLM; texts containing FAIL raise. Returns the texts analyzed."""
+    import pipeline
+
+    calls = []
+
+    async def analyze(text):
+        calls.append(text)
+        if "FAIL" in text:
+            raise RuntimeError("analysis failed")
+        return {
+            "bias_score": 30,
+            "bias_label": "Low",
+            "summary": "Summary",
+            "perspectives": ["One view"],
+            "explanation": "Explanation",
+        }
+
+    monkeypatch.setattr(pipeline, "analyze_text_async", analyze)
+    return calls
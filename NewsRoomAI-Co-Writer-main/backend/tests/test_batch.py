@@ -0,0 +1,43 @@
+import uuid
+
+
+def unique(text):
+    # Fresh text per test so near-duplicate reuse never answers instead of the LLM
+    return f"{text} {uuid.uuid4().hex}"
+
+
+def test_batch_reports_each_item_on_its_own(client, fake_analysis):
+    items = [
+        {"text": unique("A council story.")},
+        {"text": unique("FAIL this one.")},
+        {"text": "   "},
+        {"text": unique("A ministry story.")},
+    ]
+
+    response = client.post("/analyze/batch", json={"items": items})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["skipped"], body["failed"]) == (2, 0, 2)
+    statuses = [(r["index"], r["status"]) for r in body["results"]]
+    assert statuses == [(0, "ok"), (1, "error"), (2, "error"), (3, "ok")]
+    assert body["results"][1]["error"] == "analysis failed"
+    assert body["results"][2]["error"] == "No article content found"
+
+    # Failures don't keep the rest of the batch out of the database
+    for result in (body["results"][0], body["results"][3]):
+        assert client.get(f"/articles/{result['id']}").status_code == 200
+
+
+def test_batch_skips_items_under_the_prescore_threshold(client, fake_analysis):
+    response = client.post("/analyze/batch", json={
+        "items": [{"text": unique("The committee met on Tuesday.")}],
+        "prescore_threshold": 100,
+    })
+
+    assert response.json()["results"][0]["status"] == "skipped"
+    assert fake_analysis == []
+
+
+def test_batch_rejects_empty_input(client):
+    assert client.post("/analyze/batch", json={"items": []}).status_code == 400
@@ -0,0 +1,45 @@
+import glob
+import json
+import sys
+
+from bench import run
+from bench.corpus import make_corpus
+
+
+def bench_report(monkeypatch, tmp_path, seed):
+    monkeypatch.setattr(run, "RESULTS_DIR", str(tmp_path))
+    monkeypatch.setattr(sys, "argv", [
+        "bench.run", "--requests", "3", "--concurrency", "2", "--seed", str(seed),
+        "--paragraphs", "2", "--llm-latency", "0", "--timeout", "30",
+    ])
+    assert run.main() == 0
+    [path] = glob.glob(str(tmp_path / "*.json"))
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def outcome(report):
+    # Timings vary between runs; what was sent and how it was answered must not
+    return {
+        "config": report["config"],
+        "llm_calls": report["llm_calls"],
+        "scenarios": {
+            name: (result["requests"], result["ok"], result["errors"])
+            for name, result in report["scenarios"].items()
+        },
+    }
+
+
+def test_corpus_is_reproducible():
+    assert make_corpus(5, 2) == make_corpus(5, 2)
+    assert make_corpus(5, 2, seed=1) != make_corpus(5, 2)
+
+
+def test_bench_runs_against_stub_and_repeats(monkeypatch, tmp_path):
+    first = bench_report(monkeypatch, tmp_path / "first", seed=2)
+    second = bench_report(monkeypatch, tmp_path / "second", seed=2)
+
+    assert set(first["scenarios"]) == set(run.SCENARIOS)
+    for result in first["scenarios"].values():
+        assert result["ok"] == 3 and not result["errors"]
+    assert outcome(first) == outcome(second)
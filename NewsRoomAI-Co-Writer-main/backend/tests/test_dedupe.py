@@ -0,0 +1,24 @@
+import dedupe
+from dedupe import _PERMUTATIONS, _PRIME, _MAX_HASH, _hash, minhash_signature, shingles, similarity
+
+
+def reference_signature(text):
+    hashes = [_hash(s) for s in shingles(text)]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in _PERMUTATIONS)
+
+
+def test_signature_matches_the_stored_formula(monkeypatch):
+    # Fingerprints already in the database were computed with plain integers
+    monkeypatch.setattr(dedupe, "SIGNATURE_BLOCK", 7)
+    text = " ".join(f"word{i % 97} extra{i % 13}" for i in range(400))
+    assert minhash_signature.__wrapped__(text) == reference_signature(text)
+    assert minhash_signature("") == ()
+
+
+def test_near_duplicates_score_high():
+    base = " ".join(f"token{i}" for i in range(300))
+    edited = base.replace("token150", "changed")
+    other = " ".join(f"other{i}" for i in range(300))
+
+    assert similarity(minhash_signature(base), minhash_signature(edited)) > 0.9
+    assert similarity(minhash_signature(base), minhash_signature(other)) < 0.1
@@ -0,0 +1,51 @@
+import os
+import time
+
+import fetcher
+from fetcher import ArticleFetcher, FetchResponse, canonical_url
+
+
+class RecordingTransport:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, headers, timeout):
+        self.urls.append(url)
+        return FetchResponse(status=200, body="<html>page</html>", headers={})
+
+
+def test_canonical_url_drops_only_tracking_params():
+    url = "https://Example.com/news/story/?utm_source=x&reference=7&ref=home&refresh=1&b=2&a=1"
+    assert canonical_url(url) == "https://example.com/news/story?a=1&b=2&reference=7&refresh=1"
+
+
+def test_fetch_requests_the_url_as_given(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetcher, "extract_article", lambda url, html: ("Title", "Body text"))
+    transport = RecordingTransport()
+    article_fetcher = ArticleFetcher(transport=transport, cache_dir=str(tmp_path))
+
+    url = "https://example.com/story/?b=2&a=1&utm_medium=feed"
+    assert article_fetcher.fetch(url) == ("Title", "Body text")
+    # Same page under its canonical form is served from the cache
+    assert article_fetcher.fetch("https://example.com/story?a=1&b=2") == ("Title", "Body text")
+
+    assert transport.urls == [url]
+
+
+def test_prune_cache_evicts_old_and_excess_entries(tmp_path):
+    article_fetcher = ArticleFetcher(
+        transport=RecordingTransport(), cache_dir=str(tmp_path), max_age_seconds=3600, max_entries=2
+    )
+    now = time.time()
+    for i, age in enumerate([10, 20, 30, 7200]):
+        article_fetcher._write_cache(f"https://example.com/{i}", {"fetched_at": now}, "<html/>")
+        meta_path, html_path = article_fetcher._paths(f"https://example.com/{i}")
+        os.utime(meta_path, (now - age, now - age))
+
+    article_fetcher.prune_cache(now)
+
+    kept = [i for i in range(4) if os.path.exists(article_fetcher._paths(f"https://example.com/{i}")[0])]
+    assert kept == [0, 1]
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(p) for i in kept for p in article_fetcher._paths(f"https://example.com/{i}")
+    )
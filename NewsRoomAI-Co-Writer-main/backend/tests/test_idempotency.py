@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from database import engine
+from idempotency import OWNER, RequestInProgress, acquire, claim_key, request_hash
+from model import RequestClaim
+
+
+def analyze(client, key, text):
+    return client.post("/analyze", json={"text": text}, headers={"Idempotency-Key": key})
+
+
+def test_replay_returns_the_stored_response(client, fake_analysis):
+    key, text = uuid.uuid4().hex, f"A story about the budget {uuid.uuid4().hex}."
+
+    first = analyze(client, key, text)
+    second = analyze(client, key, text)
+
+    assert first.status_code == second.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json() == first.json()
+    assert len(fake_analysis) == 1
+
+
+def test_reused_key_with_a_different_payload_is_rejected(client, fake_analysis):
+    key = uuid.uuid4().hex
+
+    assert analyze(client, key, f"One story {uuid.uuid4().hex}.").status_code == 200
+    response = analyze(client, key, f"Another story {uuid.uuid4().hex}.")
+
+    assert response.status_code == 422
+    assert len(fake_analysis) == 1
+
+
+def test_failed_request_leaves_no_claim(client):
+    key = uuid.uuid4().hex
+
+    assert analyze(client, key, "   ").status_code == 400
+
+    with Session(engine) as session:
+        assert session.get(RequestClaim, claim_key("analyze", key)) is None
+
+
+def add_claim(key, digest, expires_at):
+    with Session(engine) as session:
+        session.add(RequestClaim(key=key, request_hash=digest, owner="crashed", expires_at=expires_at))
+        session.commit()
+
+
+def test_abandoned_claim_is_taken_over(client):
+    key, digest = f"test:{uuid.uuid4().hex}", request_hash({"n": 1})
+    add_claim(key, digest, datetime.utcnow() - timedelta(seconds=1))
+
+    assert asyncio.run(acquire(key, digest, wait_seconds=0)) is None
+    with Session(engine) as session:
+        assert session.get(RequestClaim, key).owner == OWNER
+
+
+def test_live_claim_makes_retries_wait(client):
+    key, digest = f"test:{uuid.uuid4().hex}", request_hash({"n": 2})
+    add_claim(key, digest, datetime.utcnow() + timedelta(minutes=5))
+
+    with pytest.raises(RequestInProgress):
+        asyncio.run(acquire(key, digest, wait_seconds=0))
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlmodel import Session
+
+import ingest
+from database import engine
+from ingest import checkpoint, run_ingest, task_from_fields
+from model import IngestItem
+
+
+def story():
+    # Unrelated words per item so near-duplicate reuse never stands in for the LLM
+    return " ".join(uuid.uuid4().hex for _ in range(12))
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    calls = []
+
+    def fetch(link):
+        calls.append(link)
+        return "Fetched title", story()
+
+    monkeypatch.setattr(ingest, "fetch_article_from_link", fetch)
+    return calls
+
+
+def write_feed(tmp_path, links):
+    path = tmp_path / "feed.jsonl"
+    path.write_text("".join(json.dumps({"link": link}) + "\n" for link in links), encoding="utf-8")
+    return str(path)
+
+
+def item(key):
+    with Session(engine) as session:
+        return session.get(IngestItem, key)
+
+
+def test_rerun_resumes_each_item_from_its_last_stage(client, tmp_path, fake_analysis, fetched):
+    links = {name: f"https://example.com/{name}/{uuid.uuid4().hex}" for name in
+             ("new", "fetched", "analyzed", "done", "gave_up")}
+    feed = write_feed(tmp_path, list(links.values()))
+    tasks = {name: task_from_fields(link, None, None) for name, link in links.items()}
+
+    fetched_text = story()
+    tasks["fetched"].text = fetched_text
+    checkpoint(feed, tasks["fetched"], "fetched")
+    tasks["analyzed"].title = "Cleaned title"
+    tasks["analyzed"].text = story()
+    tasks["analyzed"].result = {"bias_score": 55, "summary": "Earlier run", "perspectives": [], "explanation": ""}
+    checkpoint(feed, tasks["analyzed"], "analyzed")
+    checkpoint(feed, tasks["done"], "done")
+    tasks["gave_up"].attempts = ingest.INGEST_MAX_ATTEMPTS
+    checkpoint(feed, tasks["gave_up"], "failed", "unreachable")
+
+    stats = asyncio.run(run_ingest(feed))
+
+    assert fetched == [links["new"]]
+    assert fetched_text in fake_analysis and len(fake_analysis) == 2
+    assert {k: stats[k] for k in ("read", "resumed", "already_done", "fetched", "analyzed", "saved")} == {
+        "read": 5, "resumed": 2, "already_done": 2, "fetched": 1, "analyzed": 2, "saved": 3,
+    }
+    for name in ("new", "fetched", "analyzed"):
+        row = item(tasks[name].key)
+        assert row.status == "done" and row.article_id is not None
+    assert item(tasks["gave_up"].key).status == "failed"
+
+    # Everything is finished now, so another pass does no work
+    again = asyncio.run(run_ingest(feed))
+    assert (again["already_done"], again["fetched"], again["analyzed"]) == (5, 0, 0)
+
+
+def test_failed_items_are_retried_until_max_attempts(client, tmp_path, fake_analysis, monkeypatch):
+    monkeypatch.setattr(ingest, "fetch_article_from_link", lambda link: ("Title", f"FAIL {story()}"))
+    feed = write_feed(tmp_path, [f"https://example.com/broken/{uuid.uuid4().hex}"])
+    [task] = list(ingest.read_feed(feed))
+
+    for attempt in range(1, ingest.INGEST_MAX_ATTEMPTS + 1):
+        stats = asyncio.run(run_ingest(feed))
+        assert stats["failed"] == 1
+        row = item(task.key)
+        assert (row.status, row.attempts, row.error) == ("failed", attempt, "analysis failed")
+
+    # The page was fetched once and kept for the retries
+    assert len(fake_analysis) == ingest.INGEST_MAX_ATTEMPTS
+    assert asyncio.run(run_ingest(feed))["already_done"] == 1
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, update
+from sqlmodel import Session
+
+import jobs
+from database import engine
+from jobs import claim_next_job, finish_job, renew_lease, requeue_stale_jobs, run_job, submit_job
+from model import AnalysisJob
+
+
+@pytest.fixture(autouse=True)
+def empty_queue(client):
+    with Session(engine) as session:
+        session.execute(delete(AnalysisJob))
+        session.commit()
+
+
+def set_job(job_id, **values):
+    with Session(engine) as session:
+        session.execute(update(AnalysisJob).where(AnalysisJob.id == job_id).values(**values))
+        session.commit()
+
+
+def load(job_id):
+    with Session(engine) as session:
+        return session.get(AnalysisJob, job_id)
+
+
+def test_expired_lease_is_reclaimed_by_another_worker():
+    job = submit_job("Some article text.", None)
+
+    claimed = claim_next_job("worker-a")
+    assert (claimed.id, claimed.status, claimed.attempts) == (job.id, "running", 1)
+    assert claim_next_job("worker-b") is None
+
+    # A live lease is left alone
+    assert requeue_stale_jobs() == 0
+
+    set_job(job.id, lease_until=datetime.utcnow() - timedelta(seconds=1))
+    assert requeue_stale_jobs() == 1
+    assert load(job.id).status == "queued"
+
+    reclaimed = claim_next_job("worker-b")
+    assert (reclaimed.id, reclaimed.worker_id, reclaimed.attempts) == (job.id, "worker-b", 2)
+
+    # The worker that lost the lease can neither renew it nor finish the job
+    assert not renew_lease(job.id, "worker-a")
+    finish_job(job.id, "worker-a", error="late failure")
+    assert load(job.id).status == "running"
+
+    assert renew_lease(job.id, "worker-b")
+    finish_job(job.id, "worker-b", article_id=7)
+    assert (load(job.id).status, load(job.id).article_id) == ("done", 7)
+
+
+def test_job_fails_after_too_many_lost_leases():
+    job = submit_job("Some article text.", None)
+    claim_next_job("worker-a")
+    set_job(
+        job.id,
+        attempts=jobs.JOB_MAX_ATTEMPTS,
+        lease_until=datetime.utcnow() - timedelta(seconds=1),
+    )
+
+    assert requeue_stale_jobs() == 1
+    assert load(job.id).status == "failed"
+    assert claim_next_job("worker-b") is None
+
+
+def test_running_job_without_lease_is_requeued_by_age():
+    job = submit_job("Some article text.", None)
+    claim_next_job("worker-a")
+    set_job(
+        job.id,
+        lease_until=None,
+        started_at=datetime.utcnow() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 1),
+    )
+
+    assert requeue_stale_jobs() == 1
+    assert load(job.id).status == "queued"
+
+
+def test_run_job_records_the_article(fake_analysis):
+    job = submit_job("A fresh article about the transit plan.", None)
+    claimed = claim_next_job("worker-a")
+
+    asyncio.run(run_job(claimed, "worker-a"))
+
+    finished = load(job.id)
+    assert finished.status == "done"
+    assert finished.article_id is not None
+    assert finished.lease_until is None
@@ -0,0 +1,64 @@
+import io
+import os
+import zipfile
+from datetime import datetime
+
+import pdf_export
+from pdf_export import build_zip, ensure_pdf, iter_file, open_cached_pdf
+
+
+def article(article_id=1, title="Title"):
+    return {
+        "id": article_id,
+        "title": title,
+        "bias_score": 40,
+        "summary": "Summary.",
+        "content": "First paragraph.\n\nSecond paragraph.",
+        "rewritten_text": None,
+    }
+
+
+def test_open_handle_survives_a_newer_render(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_export, "PDF_CACHE_DIR", str(tmp_path))
+    old, new = datetime(2026, 1, 1), datetime(2026, 1, 2)
+    ensure_pdf(article(), old)
+
+    handle = open_cached_pdf(1, old)
+    ensure_pdf(article(), new)  # removes the stale render
+
+    assert open_cached_pdf(1, old) is None
+    assert b"".join(iter_file(handle)).startswith(b"%PDF")
+
+
+def test_zip_is_removed_when_streaming_stops_early(tmp_path):
+    archive = build_zip({"1.pdf": io.BytesIO(b"%PDF-1.4 one"), "2.pdf": io.BytesIO(b"%PDF-1.4 two")})
+    with zipfile.ZipFile(archive.name) as bundle:
+        assert bundle.read("2.pdf") == b"%PDF-1.4 two"
+
+    chunks = iter_file(archive, delete=True)
+    next(chunks)
+    chunks.close()  # the client went away mid-download
+
+    assert not os.path.exists(archive.name)
+
+
+def test_export_endpoint_returns_a_zip(client, make_article, monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_export, "PDF_CACHE_DIR", str(tmp_path))
+    ids = [make_article("Body one."), make_article("Body two.")]
+
+    response = client.post("/articles/export", json={"ids": ids})
+
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as bundle:
+        assert sorted(bundle.namelist()) == sorted(f"{i}.pdf" for i in ids)
+
+
+def test_download_pdf(client, make_article, monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_export, "PDF_CACHE_DIR", str(tmp_path))
+    article_id = make_article("Body.", title="Ünïcode title")
+
+    first = client.get(f"/articles/{article_id}/download_pdf")
+    cached = client.get(f"/articles/{article_id}/download_pdf")
+
+    assert first.status_code == cached.status_code == 200
+    assert first.content.startswith(b"%PDF") and cached.content == first.content
@@ -0,0 +1,16 @@
+from prescore import FEATURES, LEXICONS, features, prescore
+
+
+def test_loaded_text_scores_above_neutral_text():
+    neutral = "The council met on Tuesday. It approved the budget for next year."
+    loaded = "The corrupt regime SLAMMED critics in a shocking, disgraceful attack! Outrageous!"
+    assert prescore(loaded) > prescore(neutral)
+
+
+def test_phrases_count_across_line_breaks():
+    vector = features("Officials, sources\nsay, were so-called experts.")
+    counts = dict(zip(FEATURES, vector))
+    words = 7
+    assert counts["hedging"] == 100.0 / words
+    assert counts["loaded"] == 100.0 / words
+    assert len(vector) == len(FEATURES) and LEXICONS == FEATURES[:4]
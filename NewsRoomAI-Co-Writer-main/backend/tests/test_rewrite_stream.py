@@ -0,0 +1,40 @@
+import json
+
+import main
+
+
+def events(response):
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        parsed.append((fields.get("event"), json.loads(fields["data"])))
+    return parsed
+
+
+def test_rewrite_stream_ends_with_error_when_the_llm_fails(client, make_article, monkeypatch):
+    async def failing_stream(text):
+        yield "Partial "
+        raise RuntimeError("upstream closed the connection")
+
+    monkeypatch.setattr(main, "stream_rewrite_article_neutral", failing_stream)
+    article_id = make_article("Some text.")
+
+    response = client.post("/rewrite/stream", json={"article_id": article_id, "text": "Some text."})
+
+    assert events(response) == [
+        ("token", {"text": "Partial "}),
+        ("error", {"detail": "upstream closed the connection"}),
+    ]
+
+
+def test_rewrite_stream_ends_with_done(client, make_article, monkeypatch):
+    async def stream(text):
+        for token in ("Neutral ", "text."):
+            yield token
+
+    monkeypatch.setattr(main, "stream_rewrite_article_neutral", stream)
+    article_id = make_article("Some text.")
+
+    response = client.post("/rewrite/stream", json={"article_id": article_id, "text": "Some text."})
+
+    assert events(response)[-1] == ("done", {"rewritten_text": "Neutral text."})
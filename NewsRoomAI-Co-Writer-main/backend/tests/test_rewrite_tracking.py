@@ -0,0 +1,54 @@
+import main
+import rewrite_tracking
+
+SOURCE = "First paragraph.\n\nSecond paragraph.\n\nThird paragraph."
+
+
+async def fake_rewrite(text: str) -> str:
+    fake_rewrite.calls.append(text)
+    return "\n\n".join(f"Neutral {p}" for p in text.split("\n\n"))
+
+
+def use_fake_rewrite(monkeypatch):
+    fake_rewrite.calls = []
+    monkeypatch.setattr(main, "rewrite_article_neutral_async", fake_rewrite)
+    monkeypatch.setattr(rewrite_tracking, "rewrite_article_neutral_async", fake_rewrite)
+
+
+def test_full_rewrite_seeds_incremental_state(client, make_article, monkeypatch):
+    use_fake_rewrite(monkeypatch)
+    article_id = make_article(SOURCE)
+
+    response = client.post("/rewrite", json={"article_id": article_id, "text": SOURCE})
+    assert response.status_code == 200
+
+    edited = SOURCE.replace("Second paragraph.", "Second paragraph, edited.")
+    assert client.put(f"/articles/{article_id}", json={"text": edited}).status_code == 200
+
+    fake_rewrite.calls = []
+    result = client.post(f"/articles/{article_id}/rewrite").json()
+
+    assert result["paragraphs_rewritten"] == 1
+    assert result["paragraphs_reused"] == 2
+    assert fake_rewrite.calls == ["Second paragraph, edited."]
+    assert result["rewritten_text"] == (
+        "Neutral First paragraph.\n\n"
+        "Neutral Second paragraph, edited.\n\n"
+        "Neutral Third paragraph."
+    )
+
+
+def test_full_rewrite_with_different_shape_drops_state(client, make_article, monkeypatch):
+    use_fake_rewrite(monkeypatch)
+    article_id = make_article(SOURCE)
+    assert client.post(f"/articles/{article_id}/rewrite").json()["paragraphs_rewritten"] == 3
+
+    async def merged(text: str) -> str:
+        return "One merged paragraph."
+
+    monkeypatch.setattr(main, "rewrite_article_neutral_async", merged)
+    client.post("/rewrite", json={"article_id": article_id, "text": SOURCE})
+
+    result = client.post(f"/articles/{article_id}/rewrite").json()
+    assert result["paragraphs_rewritten"] == 3
+    assert result["paragraphs_reused"] == 0
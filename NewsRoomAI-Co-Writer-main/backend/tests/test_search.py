@@ -0,0 +1,47 @@
+from sqlalchemy import text
+
+from database import engine
+
+
+def search(client, q):
+    response = client.get("/articles/search", params={"q": q})
+    assert response.status_code == 200
+    return {r["id"]: r for r in response.json()["results"]}
+
+
+def test_matches_deep_in_compressed_content(client, make_article):
+    filler = " ".join(f"filler{i}" for i in range(3000))
+    article_id = make_article(f"{filler} the zeppelinquorum vote passed")
+
+    results = search(client, "zeppelinquorum")
+
+    assert article_id in results
+    assert "<mark>zeppelinquorum</mark>" in results[article_id]["snippet"]
+
+
+def test_index_follows_updates_and_deletes(client, make_article):
+    article_id = make_article("the marmalade referendum")
+    assert article_id in search(client, "marmalade")
+
+    response = client.put(f"/articles/{article_id}", json={"text": "the gooseberry referendum"})
+    assert response.status_code == 200
+    assert article_id not in search(client, "marmalade")
+    assert article_id in search(client, "gooseberry")
+
+    assert client.delete(f"/articles/{article_id}").status_code == 200
+    assert article_id not in search(client, "gooseberry")
+
+
+def test_index_keeps_no_copy_of_article_text(client, make_article):
+    make_article("unduplicated body text")
+
+    with engine.begin() as conn:
+        stored = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE name = 'article_fts_content'"
+        )).scalar()
+        # Raises if the index disagrees with the decompressed article rows
+        conn.execute(text(
+            "INSERT INTO article_fts (article_fts, rank) VALUES ('integrity-check', 1)"
+        ))
+
+    assert stored is None
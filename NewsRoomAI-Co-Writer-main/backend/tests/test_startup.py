@@ -0,0 +1,35 @@
+import sys
+
+import database
+import startup
+
+
+def test_schema_check_is_skipped_once_recorded(client, monkeypatch):
+    # The client fixture has started the app, which ran the full check
+    assert database.stored_schema_version() == database.schema_version()
+
+    def no_catalog(*args, **kwargs):
+        raise AssertionError("schema inspected although the version matched")
+
+    monkeypatch.setattr(database, "inspect", no_catalog)
+    database.create_db_and_tables()
+
+
+def test_schema_change_runs_the_check_again(client, monkeypatch):
+    database.record_schema_version("stale")
+    inspected = []
+    real_inspect = database.inspect
+
+    def counting(bind):
+        inspected.append(bind)
+        return real_inspect(bind)
+
+    monkeypatch.setattr(database, "inspect", counting)
+    database.create_db_and_tables()
+
+    assert inspected
+    assert database.stored_schema_version() == database.schema_version()
+
+
+def test_import_timer_is_opt_in():
+    assert not any(isinstance(finder, startup._ImportTimer) for finder in sys.meta_path)
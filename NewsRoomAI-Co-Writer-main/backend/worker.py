@@ -0,0 +1,49 @@
+from startup import timed, mark_ready
+
+import os
+import argparse
+import asyncio
+import logging
+import signal
+
+from database import create_db_and_tables
+from jobs import run_workers
+from search import setup_search_index
+from analytics import setup_rollups
+from llm_client import close_async_client
+
+
+async def main(count: int):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    try:
+        await run_workers(count, stop)
+    finally:
+        await close_async_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run analysis job workers")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("JOB_WORKERS", "4")),
+        help="concurrent jobs handled by this process",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with timed("create_db_and_tables"):
+        create_db_and_tables()
+    with timed("setup_search_index"):
+        setup_search_index()
+    with timed("setup_rollups"):
+        setup_rollups()
+    mark_ready()
+    asyncio.run(main(args.workers))
@@ -15,16 +15,30 @@ export async function analyzeArticle({ text = "", link = "" }) {
 }
 
 /**
- * Fetch all articles
+ * Fetch all articles (list fields only), following the X-Next-Cursor pages
  */
 export async function fetchArticles() {
-  const response = await fetch(`${BASE_URL}/articles`);
+  const articles = [];
+  let cursor = null;
 
-  if (!response.ok) {
-    throw new Error("Fetch articles failed");
-  }
+  do {
+    const params = new URLSearchParams({
+      fields: "id,title,bias_score,created_at",
+      limit: "500",
+    });
+    if (cursor) params.set("cursor", cursor);
 
-  return response.json();
+    const response = await fetch(`${BASE_URL}/articles?${params}`);
+
+    if (!response.ok) {
+      throw new Error("Fetch articles failed");
+    }
+
+    articles.push(...(await response.json()));
+    cursor = response.headers.get("X-Next-Cursor");
+  } while (cursor);
+
+  return articles;
 }
 
 /**
@@ -80,7 +94,20 @@ export async function fetchFullAnalysisById(id) {
     throw new Error("Failed to fetch full analysis");
   }
 
-  return response.json();
+  const article = await response.json();
+  if (article.deep_analysis) {
+    return article;
+  }
+
+  // Deep analysis is generated on first view
+  const deepResponse = await fetch(`${BASE_URL}/articles/${id}/deep_analysis`);
+
+  if (!deepResponse.ok) {
+    throw new Error("Failed to fetch deep analysis");
+  }
+
+  const { deep_analysis } = await deepResponse.json();
+  return { ...article, deep_analysis };
 }
 
 export async function rewriteArticle({ article_id, text }) {